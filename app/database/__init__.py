@@ -1,14 +1,35 @@
 # Export MongoDB functions for easy importing
 from .mongodb import (
     get_mongodb_connection,
+    get_database,
+    get_index_diagnostics,
     push_data_to_mongodb,
     get_vegetable_prices,
     save_vegetable_prices
 )
+from .indexes import INDEX_SPECS, ensure_indexes, explain_queries
+from .aggregations import (
+    aggregate_hotel_totals,
+    aggregate_daily_totals,
+    aggregate_kitchen_spend,
+    aggregate_vegetable_quantities
+)
+from .order_store import OrderStore, get_order_store
 
 __all__ = [
     'get_mongodb_connection',
+    'get_database',
+    'get_index_diagnostics',
     'push_data_to_mongodb',
     'get_vegetable_prices',
-    'save_vegetable_prices'
+    'save_vegetable_prices',
+    'INDEX_SPECS',
+    'ensure_indexes',
+    'explain_queries',
+    'aggregate_hotel_totals',
+    'aggregate_daily_totals',
+    'aggregate_kitchen_spend',
+    'aggregate_vegetable_quantities',
+    'OrderStore',
+    'get_order_store'
 ]
@@ -0,0 +1,116 @@
+import pandas as pd
+
+ORDERS_COLLECTION = 'vegetable_orders'
+
+# Length of the formatted_date ('YYYY-MM-DD') prefix each period groups by
+PERIOD_PREFIX = {'day': 10, 'month': 7, 'year': 4}
+
+def _to_double(field):
+    """Field as a number inside a pipeline - null when missing or not numeric, so $sum skips it"""
+    return {'$convert': {'input': f'${field}', 'to': 'double', 'onError': None, 'onNull': None}}
+
+# PRICE * QUANTITY per order row; rows without a price contribute nothing
+AMOUNT = {'$multiply': [_to_double('PRICE'), _to_double('QUANTITY')]}
+
+def _period_expression(period):
+    """Group key for a period - formatted_date is ASCII, so a byte prefix is a character prefix"""
+    return {'$substrBytes': ['$formatted_date', 0, PERIOD_PREFIX[period]]}
+
+def _range_match(start_date, end_date, hotels=None):
+    """$match stage for pushed orders in a date range - formatted_date sorts as text, so the index is used"""
+    match = {'formatted_date': {
+        '$gte': pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+        '$lte': pd.Timestamp(end_date).strftime('%Y-%m-%d'),
+    }}
+    if hotels:
+        match['MAIN HOTEL NAME'] = {'$in': list(hotels)}
+    return {'$match': match}
+
+def _run(db, pipeline, columns):
+    """Run a pipeline whose final $project emits `columns` - only the aggregated rows are transferred"""
+    rows = list(db[ORDERS_COLLECTION].aggregate(pipeline))
+    return pd.DataFrame(rows, columns=columns)
+
+def aggregate_hotel_totals(db, start_date, end_date, period='day', by_kitchen=False, hotels=None):
+    """Amount and number of order rows per hotel (and kitchen) per day, month or year.
+
+    Returns PERIOD ('YYYY-MM-DD', 'YYYY-MM' or 'YYYY'), MAIN HOTEL NAME, [KITCHEN NAME,] AMOUNT, ITEMS.
+    """
+    group_id = {
+        'period': _period_expression(period),
+        'hotel': '$MAIN HOTEL NAME',
+    }
+    columns = ['PERIOD', 'MAIN HOTEL NAME']
+    if by_kitchen:
+        group_id['kitchen'] = '$KITCHEN NAME'
+        columns.append('KITCHEN NAME')
+
+    pipeline = [
+        _range_match(start_date, end_date, hotels),
+        {'$group': {'_id': group_id, 'amount': {'$sum': AMOUNT}, 'items': {'$sum': 1}}},
+        {'$project': {
+            '_id': 0, 'PERIOD': '$_id.period', 'MAIN HOTEL NAME': '$_id.hotel',
+            **({'KITCHEN NAME': '$_id.kitchen'} if by_kitchen else {}),
+            'AMOUNT': '$amount', 'ITEMS': '$items',
+        }},
+        {'$sort': {'PERIOD': 1, 'MAIN HOTEL NAME': 1}},
+    ]
+    return _run(db, pipeline, columns + ['AMOUNT', 'ITEMS'])
+
+def aggregate_daily_totals(db, start_date, end_date, by_kitchen=False, hotels=None):
+    """Daily totals computed in MongoDB, shaped like compute_daily_totals for the pushed orders.
+
+    Indexed by every day from start_date to end_date, one column per hotel - or per (hotel, kitchen)
+    when by_kitchen - and 0 for days without priced orders.
+    """
+    days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), name='DATE')
+    totals = aggregate_hotel_totals(db, start_date, end_date, period='day', by_kitchen=by_kitchen, hotels=hotels)
+    if totals.empty:
+        return pd.DataFrame(index=days)
+
+    keys = ['MAIN HOTEL NAME'] + (['KITCHEN NAME'] if by_kitchen else [])
+    totals['DATE'] = pd.to_datetime(totals['PERIOD'], format='%Y-%m-%d')
+    return (
+        totals.set_index(['DATE'] + keys)['AMOUNT']
+        .unstack(keys, fill_value=0.0)
+        .reindex(days, fill_value=0.0)
+    )
+
+def aggregate_kitchen_spend(db, start_date, end_date, hotels=None):
+    """Spend per hotel and kitchen over a date range.
+
+    Returns MAIN HOTEL NAME, KITCHEN NAME, AMOUNT, ITEMS and UNPRICED ITEMS (rows without a price,
+    which are not in AMOUNT).
+    """
+    pipeline = [
+        _range_match(start_date, end_date, hotels),
+        {'$group': {
+            '_id': {'hotel': '$MAIN HOTEL NAME', 'kitchen': '$KITCHEN NAME'},
+            'amount': {'$sum': AMOUNT},
+            'items': {'$sum': 1},
+            'unpriced': {'$sum': {'$cond': [{'$eq': [_to_double('PRICE'), None]}, 1, 0]}},
+        }},
+        {'$project': {
+            '_id': 0, 'MAIN HOTEL NAME': '$_id.hotel', 'KITCHEN NAME': '$_id.kitchen',
+            'AMOUNT': '$amount', 'ITEMS': '$items', 'UNPRICED ITEMS': '$unpriced',
+        }},
+        {'$sort': {'MAIN HOTEL NAME': 1, 'KITCHEN NAME': 1}},
+    ]
+    return _run(db, pipeline, ['MAIN HOTEL NAME', 'KITCHEN NAME', 'AMOUNT', 'ITEMS', 'UNPRICED ITEMS'])
+
+def aggregate_vegetable_quantities(db, start_date, end_date, hotels=None):
+    """Total quantity and amount per vegetable and unit over a date range, sorted by vegetable name"""
+    pipeline = [
+        _range_match(start_date, end_date, hotels),
+        {'$group': {
+            '_id': {'vegetable': '$PIVOT_VEGETABLE_NAME', 'units': '$UNITS'},
+            'quantity': {'$sum': _to_double('QUANTITY')},
+            'amount': {'$sum': AMOUNT},
+        }},
+        {'$project': {
+            '_id': 0, 'PIVOT_VEGETABLE_NAME': '$_id.vegetable', 'UNITS': '$_id.units',
+            'QUANTITY': '$quantity', 'AMOUNT': '$amount',
+        }},
+        {'$sort': {'PIVOT_VEGETABLE_NAME': 1, 'UNITS': 1}},
+    ]
+    return _run(db, pipeline, ['PIVOT_VEGETABLE_NAME', 'UNITS', 'QUANTITY', 'AMOUNT'])
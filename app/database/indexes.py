@@ -0,0 +1,98 @@
+from pymongo.errors import OperationFailure
+
+# Indexes every hotel_orders collection is expected to have: collection -> index specs.
+# audits needs none - "Recent Orders" sorts on _id, which MongoDB always indexes.
+INDEX_SPECS = {
+    'vegetable_orders': [
+        # Day reads and delta pushes; rows pushed before row keys existed have no row_key
+        {
+            'keys': [('formatted_date', 1), ('row_key', 1)],
+            'name': 'formatted_date_row_key',
+            'unique': True,
+            'partialFilterExpression': {'row_key': {'$exists': True}},
+        },
+        {'keys': [('formatted_date', 1), ('MAIN HOTEL NAME', 1)], 'name': 'formatted_date_hotel'},
+        # Date-range reads in sheet order (order_store)
+        {'keys': [('formatted_date', 1), ('sheet_row', 1)], 'name': 'formatted_date_sheet_row'},
+    ],
+    'vegetable_prices': [
+        {'keys': [('date', 1), ('vegetable_name', 1), ('units', 1)], 'name': 'date_vegetable_units'},
+        # Prices revision reads (get_prices_revision) - covered by the index
+        {'keys': [('date', 1), ('timestamp', -1)], 'name': 'date_timestamp'},
+    ],
+    'master_veg_name': [
+        {'keys': [('HOTEL_NAME', 1)], 'name': 'hotel_name'},
+    ],
+}
+
+def ensure_indexes(db):
+    """Create any missing INDEX_SPECS indexes - safe to run repeatedly.
+
+    Returns one row per index: collection, name and status ('ok', or the error when an index with
+    the same name or keys but other options already exists).
+    """
+    report = []
+    for collection_name, specs in INDEX_SPECS.items():
+        for spec in specs:
+            options = {key: value for key, value in spec.items() if key != 'keys'}
+            try:
+                db[collection_name].create_index(spec['keys'], **options)
+                status = 'ok'
+            except OperationFailure as e:
+                status = f"error: {e}"
+            report.append({'collection': collection_name, 'index': spec['name'], 'status': status})
+    return report
+
+def _diagnostic_queries(date_str, hotel_name):
+    """(collection, description, filter, sort) for the queries the app runs"""
+    return [
+        ('vegetable_orders', 'orders for a day', {'formatted_date': date_str}, None),
+        ('vegetable_orders', 'orders for a day and hotel',
+         {'formatted_date': date_str, 'MAIN HOTEL NAME': hotel_name}, None),
+        ('vegetable_prices', 'prices for a day', {'date': date_str}, None),
+        ('vegetable_prices', 'prices revision for a day', {'date': date_str}, [('timestamp', -1)]),
+        ('master_veg_name', 'vegetable names for a hotel', {'HOTEL_NAME': hotel_name.upper()}, None),
+        ('audits', 'recent orders', {}, [('_id', -1)]),
+    ]
+
+def _plan_stages(plan):
+    """Stage names and index names of a winning plan, outermost first (all branches of OR plans)"""
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        plan = pending.pop(0)
+        stages.append(plan.get('stage', '?'))
+        if plan.get('indexName'):
+            indexes.append(plan['indexName'])
+        if plan.get('inputStage'):
+            pending.append(plan['inputStage'])
+        pending.extend(plan.get('inputStages', []))
+    return stages, indexes
+
+def explain_queries(db, date_str, hotel_name):
+    """Explain the app's queries for sample values - one row per query with its plan and work done.
+
+    A COLLSCAN stage, or docs examined far above docs returned, means the query is not using an index.
+    """
+    rows = []
+    for collection_name, description, query, sort in _diagnostic_queries(date_str, hotel_name):
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort).limit(10)
+        explain = cursor.explain()
+
+        winning_plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+        # Plans from the slot-based engine nest the classic plan under queryPlan
+        stages, indexes = _plan_stages(winning_plan.get('queryPlan', winning_plan))
+        stats = explain.get('executionStats', {})
+        rows.append({
+            'collection': collection_name,
+            'query': description,
+            'plan': ' <- '.join(stages),
+            'index': ', '.join(indexes) or '-',
+            'indexed': 'COLLSCAN' not in stages,
+            'docs examined': stats.get('totalDocsExamined'),
+            'keys examined': stats.get('totalKeysExamined'),
+            'returned': stats.get('nReturned'),
+        })
+    return rows
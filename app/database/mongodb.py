@@ -1,28 +1,145 @@
+import hashlib
+import json
+import threading
+import time
 import streamlit as st
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import DeleteMany, MongoClient, ReplaceOne, UpdateOne
 from datetime import datetime
+from utils.schema import DERIVED_COLUMNS
+from .indexes import ensure_indexes, explain_queries
+
+DATABASE_NAME = "hotel_orders"
+
+# Natural key of an order row within a day (see build_order_documents)
+ROW_KEY_COLUMNS = ['MAIN HOTEL NAME', 'KITCHEN NAME', 'PIVOT_VEGETABLE_NAME', 'UNITS']
+# Operations per bulk_write call
+PUSH_CHUNK_SIZE = 1000
+
+# Pool and timeout defaults - each can be overridden in the [mongodb] secrets section
+CLIENT_SETTINGS = {
+    'max_pool_size': ('maxPoolSize', 20),
+    'min_pool_size': ('minPoolSize', 0),
+    'max_idle_time_ms': ('maxIdleTimeMS', 300000),
+    'server_selection_timeout_ms': ('serverSelectionTimeoutMS', 5000),
+    'connect_timeout_ms': ('connectTimeoutMS', 5000),
+    'socket_timeout_ms': ('socketTimeoutMS', 30000),
+}
+
+class SharedMongoClient:
+    """One pooled MongoClient for the whole process, created on first use.
+    
+    Requests borrow pooled connections, so after the first call a query costs a round trip rather
+    than a new TCP/TLS handshake and authentication. The client is pinged when it is created and
+    again when it has not been checked for `health_check_interval` seconds; if that ping fails the
+    client is replaced. Callers must not close it. `on_connect` runs with each new client, after
+    its first ping.
+    """
+    
+    def __init__(self, connection_string, options, health_check_interval=60, on_connect=None):
+        self.connection_string = connection_string
+        self.options = options
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect
+        self._lock = threading.Lock()
+        self._client = None
+        self._checked_at = 0.0
+    
+    def get(self):
+        with self._lock:
+            if self._client is not None and time.monotonic() - self._checked_at > self.health_check_interval:
+                try:
+                    self._client.admin.command('ping')
+                    self._checked_at = time.monotonic()
+                except Exception:
+                    self._client.close()
+                    self._client = None
+            
+            if self._client is None:
+                client = MongoClient(self.connection_string, **self.options)
+                try:
+                    # Fail fast when the server can't be reached instead of on the first query
+                    client.admin.command('ping')
+                except Exception:
+                    client.close()
+                    raise
+                self._client = client
+                self._checked_at = time.monotonic()
+                if self.on_connect:
+                    self.on_connect(client)
+            return self._client
+
+@st.cache_resource
+def _get_shared_client():
+    """Process-wide client holder, configured from st.secrets"""
+    settings = st.secrets.mongodb if "mongodb" in st.secrets else {}
+    # Default local connection for development
+    connection_string = settings.get('connection_string', "")
+    options = {option: int(settings.get(key, default)) for key, (option, default) in CLIENT_SETTINGS.items()}
+    return SharedMongoClient(connection_string, options, int(settings.get('health_check_interval', 60)),
+                             on_connect=_bootstrap_indexes)
+
+# Result of the last index bootstrap, shown by get_index_diagnostics
+_index_report = []
+
+def _bootstrap_indexes(client):
+    """Make sure the expected indexes exist whenever a client connects - a no-op once they do"""
+    global _index_report
+    try:
+        _index_report = ensure_indexes(client[DATABASE_NAME])
+    except Exception as e:
+        # Missing indexes slow queries down but must not stop the app
+        _index_report = [{'collection': '-', 'index': '-', 'status': f"error: {e}"}]
 
 def get_mongodb_connection():
-    """Get MongoDB connection"""
+    """Get the shared MongoDB client (don't close it) - None if MongoDB can't be reached"""
     try:
-        # Use st.secrets for MongoDB connection string
-        if "mongodb" in st.secrets:
-            connection_string = st.secrets.mongodb.connection_string
-        else:
-            # Default local connection for development
-            connection_string = ""
-            
-        client = MongoClient(connection_string)
-        # Ping the server to check connection
-        client.admin.command('ping')
-        return client
+        return _get_shared_client().get()
     except Exception as e:
         st.error(f"Error connecting to MongoDB: {str(e)}")
         return None
 
+def get_database():
+    """The hotel_orders database on the shared client - raises if MongoDB can't be reached"""
+    return _get_shared_client().get()[DATABASE_NAME]
+
+def get_index_diagnostics(date_str, hotel_name):
+    """Index bootstrap report and explain rows for the app's queries (see database.indexes)"""
+    db = get_database()
+    return list(_index_report), explain_queries(db, date_str, hotel_name)
+
+def build_order_documents(filtered_df, date_str):
+    """Documents for one day's order rows (as from process_data_for_date), as stored in vegetable_orders.
+    
+    row_key is the natural key (date, hotel, kitchen, vegetable, units) plus the occurrence of that
+    key within the day, so repeated rows stay distinct. content_hash covers the order fields only.
+    sheet_row is the row's number in the sheet (header is row 1), so reads can restore sheet order;
+    it is set after hashing, so rows inserted or deleted above a row don't change its hash.
+    Missing values are stored as None.
+    """
+    records_df = filtered_df.drop(columns=DERIVED_COLUMNS, errors='ignore')
+    
+    natural_key = pd.Series(date_str, index=records_df.index)
+    for column in ROW_KEY_COLUMNS:
+        natural_key = natural_key + '|' + records_df[column].astype(str)
+    row_keys = natural_key + '|' + natural_key.groupby(natural_key).cumcount().astype(str)
+    
+    records = records_df.astype(object).where(records_df.notna(), None).to_dict('records')
+    for record, row_key, index in zip(records, row_keys, records_df.index):
+        record['formatted_date'] = date_str
+        record['row_key'] = row_key
+        record['content_hash'] = hashlib.sha1(
+            json.dumps(record, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        record['sheet_row'] = int(index) + 2
+    return records
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 def push_data_to_mongodb(df, selected_date):
-    """Push data from Google Sheets to MongoDB"""
+    """Push data from Google Sheets to MongoDB - only new, changed and removed rows are written"""
     if df.empty:
         return False, "No data to push to MongoDB"
     
@@ -35,7 +152,7 @@ def push_data_to_mongodb(df, selected_date):
         date_str = selected_date.strftime('%Y-%m-%d')
         
         # Create or get database and collection
-        db = client["hotel_orders"]
+        db = client[DATABASE_NAME]
         collection = db["vegetable_orders"]
         
         # Process data for MongoDB
@@ -44,61 +161,95 @@ def push_data_to_mongodb(df, selected_date):
         if filtered_df.empty:
             return False, f"No data found for date: {date_str}"
         
-        # Convert DataFrame to list of dictionaries for MongoDB
-        records = filtered_df.to_dict('records')
+        documents = build_order_documents(filtered_df, date_str)
+        
+        # Hashes and sheet rows of what is stored for this date; documents from before row keys
+        # existed are replaced
+        stored = {}
+        legacy_ids = []
+        for doc in collection.find({"formatted_date": date_str}, {"row_key": 1, "content_hash": 1, "sheet_row": 1}):
+            if 'row_key' in doc:
+                stored[doc['row_key']] = (doc.get('content_hash'), doc.get('sheet_row'))
+            else:
+                legacy_ids.append(doc['_id'])
         
-        # Add timestamp and formatted date
-        for record in records:
-            record['timestamp'] = datetime.now()
-            record['formatted_date'] = date_str
+        operations = []
+        renumbered = 0
+        now = datetime.now()
+        for document in documents:
+            content_hash, sheet_row = stored.get(document['row_key'], (None, None))
+            if content_hash != document['content_hash']:
+                document['timestamp'] = now
+                operations.append(ReplaceOne(
+                    {"formatted_date": date_str, "row_key": document['row_key']}, document, upsert=True
+                ))
+            elif sheet_row != document['sheet_row']:
+                # Same order, moved by rows inserted or deleted above it - only its position changes
+                operations.append(UpdateOne(
+                    {"formatted_date": date_str, "row_key": document['row_key']},
+                    {"$set": {"sheet_row": document['sheet_row']}}
+                ))
+                renumbered += 1
         
-        # Delete existing records for this date to avoid duplicates
-        collection.delete_many({"formatted_date": date_str})
+        new_keys = {document['row_key'] for document in documents}
+        removed_keys = [row_key for row_key in stored if row_key not in new_keys]
+        for keys in _chunks(removed_keys, PUSH_CHUNK_SIZE):
+            operations.append(DeleteMany({"formatted_date": date_str, "row_key": {"$in": keys}}))
+        for ids in _chunks(legacy_ids, PUSH_CHUNK_SIZE):
+            operations.append(DeleteMany({"_id": {"$in": ids}}))
         
-        # Insert new records
-        collection.insert_many(records)
+        # Rows are replaced in place, so readers never see the day empty
+        written = deleted = 0
+        for chunk in _chunks(operations, PUSH_CHUNK_SIZE):
+            result = collection.bulk_write(chunk, ordered=False)
+            written += result.upserted_count + result.modified_count
+            deleted += result.deleted_count
+        written -= renumbered
         
-        return True, f"Successfully pushed {len(records)} records to MongoDB"
+        unchanged = len(documents) - sum(isinstance(operation, ReplaceOne) for operation in operations)
+        return True, f"Pushed {len(documents)} records to MongoDB ({written} written, {deleted} removed, {unchanged} unchanged)"
         
     except Exception as e:
         return False, f"Error pushing data to MongoDB: {str(e)}"
-    finally:
-        if 'client' in locals() and client:
-            client.close()
+
+def get_prices_revision(date_str):
+    """Revision of one day's saved prices: (price count, latest save timestamp).
+
+    Every save replaces the day's prices with freshly timestamped ones, so the revision changes
+    with each save from any server process. Only timestamps are read, from the date_timestamp index.
+    """
+    cursor = get_database()["vegetable_prices"].find({"date": date_str}, {"_id": 0, "timestamp": 1})
+    timestamps = [doc.get('timestamp') for doc in cursor.sort('timestamp', -1)]
+    return len(timestamps), timestamps[0] if timestamps else None
+
+@st.cache_data(max_entries=32)
+def _load_vegetable_prices(date_str, revision):
+    """Read one day's prices - cached per prices revision, errors are raised so they are not cached"""
+    prices_collection = get_database()["vegetable_prices"]
+    
+    # Get prices for the selected date
+    prices = list(prices_collection.find({"date": date_str}))
+    
+    if not prices:
+        return pd.DataFrame()
+        
+    # Convert to DataFrame
+    prices_df = pd.DataFrame(prices)
+    if '_id' in prices_df.columns:
+        prices_df = prices_df.drop('_id', axis=1)
+        
+    return prices_df
 
 def get_vegetable_prices(selected_date):
     """Get vegetable prices from MongoDB"""
     try:
-        client = get_mongodb_connection()
-        if not client:
-            return pd.DataFrame()
-        
         # Convert selected_date to string format for MongoDB
         date_str = selected_date.strftime('%Y-%m-%d')
-        
-        # Get database and collection
-        db = client["hotel_orders"]
-        prices_collection = db["vegetable_prices"]
-        
-        # Get prices for the selected date
-        prices = list(prices_collection.find({"date": date_str}))
-        
-        if not prices:
-            return pd.DataFrame()
-            
-        # Convert to DataFrame
-        prices_df = pd.DataFrame(prices)
-        if '_id' in prices_df.columns:
-            prices_df = prices_df.drop('_id', axis=1)
-            
-        return prices_df
+        return _load_vegetable_prices(date_str, get_prices_revision(date_str))
         
     except Exception as e:
         st.error(f"Error fetching vegetable prices from MongoDB: {str(e)}")
         return pd.DataFrame()
-    finally:
-        if 'client' in locals() and client:
-            client.close()
 
 def save_vegetable_prices(prices_data, selected_date):
     """Save vegetable prices to MongoDB"""
@@ -114,7 +265,7 @@ def save_vegetable_prices(prices_data, selected_date):
         date_str = selected_date.strftime('%Y-%m-%d')
         
         # Create or get database and collection
-        db = client["hotel_orders"]
+        db = client[DATABASE_NAME]
         prices_collection = db["vegetable_prices"]
         
         # Add date to each record
@@ -132,6 +283,3 @@ def save_vegetable_prices(prices_data, selected_date):
         
     except Exception as e:
         return False, f"Error saving vegetable prices to MongoDB: {str(e)}"
-    finally:
-        if 'client' in locals() and client:
-            client.close()
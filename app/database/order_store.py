@@ -0,0 +1,181 @@
+import pandas as pd
+from utils.data_processing import process_data_for_range
+from utils.schema import DERIVED_COLUMNS, compact_dimensions, fill_missing_dimensions, to_float
+from .mongodb import build_order_documents, get_database
+
+ORDERS_COLLECTION = 'vegetable_orders'
+
+# Bookkeeping fields of pushed documents - never returned as order columns
+METADATA_FIELDS = ['_id', 'formatted_date', 'row_key', 'sheet_row', 'content_hash', 'timestamp']
+
+def _day_strings(start_date, end_date):
+    return [day.strftime('%Y-%m-%d') for day in pd.date_range(
+        pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())]
+
+def _range_query(start_date, end_date):
+    return {'formatted_date': {
+        '$gte': pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+        '$lte': pd.Timestamp(end_date).strftime('%Y-%m-%d'),
+    }}
+
+class OrderStore:
+    """Order rows for a date range, from the Google Sheets snapshot or the copy pushed to MongoDB.
+
+    Rows come back as process_data_for_range would return them from the sheet: DATE parsed, zero
+    quantities removed, in sheet order, with the snapshot's row index (sheet row - 2). Ranges served
+    from both sources are ordered by day instead, each day in its source's order, with a fresh index.
+    The sheet is
+    the default source, so a Fetch Latest Data refresh shows up straight away; MongoDB is only
+    queried when the snapshot is empty (Google Sheets unreachable) or when the caller prefers it.
+    Pushed days reflect the sheet as of their last push - check_consistency reports days that
+    have changed since.
+
+    `get_db` returns the database; it is called per query, so an unreachable server only fails
+    (and falls back to the sheet) when MongoDB is actually needed.
+    """
+
+    def __init__(self, get_db, load_sheet):
+        self.get_db = get_db
+        self.load_sheet = load_sheet
+
+    def _orders(self):
+        return self.get_db()[ORDERS_COLLECTION]
+
+    def pushed_days(self, start_date, end_date):
+        """Days in the range with orders in MongoDB ('YYYY-MM-DD' strings)"""
+        return set(self._orders().distinct('formatted_date', _range_query(start_date, end_date)))
+
+    def read_pushed(self, start_date, end_date, columns=None):
+        """Pushed orders in the range, with only `columns` (plus DATE) when given"""
+        if columns is None:
+            projection = {field: 0 for field in METADATA_FIELDS if field not in ('formatted_date', 'sheet_row')}
+        else:
+            projection = {column: 1 for column in ['DATE'] + [c for c in columns if c != 'DATE']}
+            projection.update({'_id': 0, 'formatted_date': 1, 'sheet_row': 1})
+
+        cursor = self._orders().find(_range_query(start_date, end_date), projection)
+        documents = list(cursor.sort([('formatted_date', 1), ('sheet_row', 1)]))
+        if not documents:
+            return pd.DataFrame(columns=['DATE'] + [c for c in (columns or []) if c != 'DATE'])
+
+        df = pd.DataFrame(documents)
+        # Index and order rows like the snapshot, so sheet row numbers carry over; rows pushed
+        # before sheet_row was stored keep date order with a fresh index
+        df.attrs['sheet_rows'] = 'sheet_row' in df.columns and bool(df['sheet_row'].notna().all())
+        if df.attrs['sheet_rows']:
+            df.index = pd.Index(df['sheet_row'].astype('int64').to_numpy() - 2)
+            df = df.sort_index(kind='mergesort')
+        df = df.drop(columns=[c for c in ('formatted_date', 'sheet_row') if c in df.columns])
+        if columns is not None:
+            # Documents keep their stored field order - return the columns as requested
+            df = df[['DATE'] + [c for c in columns if c != 'DATE' and c in df.columns]]
+
+        df['DATE'] = pd.to_datetime(df['DATE'], errors='coerce')
+        for column in ('QUANTITY', 'PRICE'):
+            if column in df.columns:
+                df[column] = to_float(df[column])
+        # Documents pushed before the typed schema can hold None/NaN dimensions and 'nan' Telugu names
+        fill_missing_dimensions(df)
+        return compact_dimensions(df)
+
+    def get_orders(self, start_date, end_date, columns=None, prefer_mongodb=False):
+        """Orders for the range - returns (DataFrame, sources).
+
+        sources maps 'mongodb' and 'sheets' to the days each one served, and 'error' to the
+        MongoDB error when it had to be skipped (None otherwise). With prefer_mongodb, pushed days
+        are read from MongoDB with a projection of `columns` and only the rest from the sheet.
+        Combined results are ordered by (DATE, source position) with a fresh RangeIndex.
+        """
+        days = _day_strings(start_date, end_date)
+        sources = {'mongodb': [], 'sheets': [], 'error': None}
+        if not prefer_mongodb:
+            sheet = self.load_sheet()
+            if not sheet.empty:
+                sources['sheets'] = days
+                return self._sheet_rows(sheet, start_date, end_date, days, columns), sources
+
+        try:
+            pushed = sorted(self.pushed_days(start_date, end_date))
+            mongo_df = self.read_pushed(start_date, end_date, columns) if pushed else None
+        except Exception as e:
+            pushed, mongo_df = [], None
+            sources['error'] = str(e)
+        sources['mongodb'] = pushed
+
+        if not prefer_mongodb:
+            # No sheet data to serve - the pushed copy is the best there is
+            return (mongo_df if mongo_df is not None else pd.DataFrame()), sources
+
+        missing = [day for day in days if day not in pushed]
+        sources['sheets'] = missing
+        if not missing:
+            return mongo_df, sources
+
+        sheet_df = self._sheet_rows(self.load_sheet(), start_date, end_date, missing, columns)
+        if mongo_df is None or mongo_df.empty:
+            return sheet_df, sources
+        if sheet_df.empty:
+            return mongo_df, sources
+
+        # Pushed rows are indexed by their sheet rows as of the last push, which can collide with
+        # the snapshot's - order by (DATE, source position) and renumber instead. Days come from one
+        # source each, so every day keeps its own sheet order.
+        # Categoricals with different categories concatenate as object - recompact afterwards
+        combined = pd.concat([mongo_df, sheet_df]).sort_values('DATE', kind='mergesort').reset_index(drop=True)
+        return compact_dimensions(combined), sources
+
+    def _sheet_rows(self, sheet, start_date, end_date, days, columns):
+        """Rows of the sheet snapshot dated on one of `days`"""
+        if sheet.empty:
+            return pd.DataFrame()
+        rows = process_data_for_range(sheet, start_date, end_date)
+        if rows.empty:
+            return rows
+        rows = rows[rows['DATE'].dt.strftime('%Y-%m-%d').isin(days)]
+        rows = rows.drop(columns=DERIVED_COLUMNS, errors='ignore')
+        if columns is not None:
+            rows = rows[['DATE'] + [c for c in columns if c != 'DATE' and c in rows.columns]]
+        return rows
+
+    def check_consistency(self, start_date, end_date):
+        """Compare pushed orders with the sheet, day by day, using the stored row keys and hashes.
+
+        Returns one row per day with orders in either source: sheet and MongoDB row counts, rows
+        missing from MongoDB, rows changed since the push, rows only in MongoDB, and a STATUS of
+        'in sync', 'out of date', 'not pushed' or 'not in sheet'.
+        """
+        stored = {}
+        for doc in self._orders().find(
+                _range_query(start_date, end_date), {'_id': 0, 'formatted_date': 1, 'row_key': 1, 'content_hash': 1}):
+            stored.setdefault(doc['formatted_date'], {})[doc.get('row_key')] = doc.get('content_hash')
+
+        sheet = self.load_sheet()
+        rows = process_data_for_range(sheet, start_date, end_date) if not sheet.empty else pd.DataFrame()
+        expected = {}
+        if not rows.empty:
+            for day, day_rows in rows.groupby(rows['DATE'].dt.strftime('%Y-%m-%d'), sort=True):
+                expected[day] = {doc['row_key']: doc['content_hash'] for doc in build_order_documents(day_rows, day)}
+
+        report = []
+        for day in sorted(set(stored) | set(expected)):
+            in_mongo, in_sheet = stored.get(day, {}), expected.get(day, {})
+            missing = sum(key not in in_mongo for key in in_sheet)
+            changed = sum(key in in_mongo and in_mongo[key] != content_hash for key, content_hash in in_sheet.items())
+            extra = sum(key not in in_sheet for key in in_mongo)
+            if not in_mongo:
+                status = 'not pushed'
+            elif not in_sheet:
+                status = 'not in sheet'
+            else:
+                status = 'in sync' if not (missing or changed or extra) else 'out of date'
+            report.append({
+                'DATE': day, 'SHEET ROWS': len(in_sheet), 'MONGODB ROWS': len(in_mongo),
+                'MISSING IN MONGODB': missing, 'CHANGED': changed, 'ONLY IN MONGODB': extra, 'STATUS': status,
+            })
+        return pd.DataFrame(report, columns=['DATE', 'SHEET ROWS', 'MONGODB ROWS', 'MISSING IN MONGODB',
+                                             'CHANGED', 'ONLY IN MONGODB', 'STATUS'])
+
+def get_order_store():
+    """Order store over the Google Sheets snapshot and the shared MongoDB client"""
+    from utils.sheets import get_google_sheets_data
+    return OrderStore(get_database, get_google_sheets_data)
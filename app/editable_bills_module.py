@@ -2,9 +2,10 @@ import streamlit as st
 import pandas as pd
 from utils.sheets import get_google_sheets_data
 from utils.data_processing import process_data_for_date
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+from utils.schema import DERIVED_COLUMNS
+from utils.sheets_client import get_sheets_writer
 from reports.bills_reports import create_kitchen_bills_pdf, create_kitchen_bills_preview
+from reports.formatting import format_quantity, format_amount
 from io import BytesIO
 from datetime import datetime
 
@@ -71,57 +72,37 @@ def show_editable_bills_section():
                 st.markdown("**Bill Preview (after edit):**")
                 # Group by vegetable/unit, sum quantities, and show columns as in main bill
                 grouped = (
-                    edited_df.groupby(['PIVOT_VEGETABLE_NAME', 'UNITS'], dropna=False)
+                    edited_df.groupby(['PIVOT_VEGETABLE_NAME', 'UNITS'], dropna=False, observed=True)
                     .agg({'QUANTITY': 'sum'})
                     .reset_index()
                 )
-                # If PRICE exists, use it; else, fill with blank
-                if 'PRICE' in kitchen_df.columns:
-                    price_map = kitchen_df.set_index(['PIVOT_VEGETABLE_NAME', 'UNITS'])['PRICE'].to_dict()
-                    grouped['PRICE'] = grouped.apply(lambda row: price_map.get((row['PIVOT_VEGETABLE_NAME'], row['UNITS']), ''), axis=1)
-                else:
-                    grouped['PRICE'] = ''
-                # Calculate TOTAL if price is available
-                def calc_total(row):
-                    try:
-                        return f"{float(row['PRICE']) * float(row['QUANTITY']):.2f}" if row['PRICE'] and str(row['PRICE']).strip() else ''
-                    except:
-                        return ''
-                grouped['TOTAL'] = grouped.apply(calc_total, axis=1)
+                # Look up price and Telugu name per vegetable/unit from the day's rows (last row wins, as before)
+                lookup_cols = [col for col in ['PRICE', 'TELUGU NAME'] if col in kitchen_df.columns]
+                lookup = kitchen_df[['PIVOT_VEGETABLE_NAME', 'UNITS'] + lookup_cols].drop_duplicates(['PIVOT_VEGETABLE_NAME', 'UNITS'], keep='last')
+                grouped = grouped.merge(lookup, on=['PIVOT_VEGETABLE_NAME', 'UNITS'], how='left')
+                if 'PRICE' not in grouped.columns:
+                    grouped['PRICE'] = float('nan')
+                if 'TELUGU NAME' not in grouped.columns:
+                    grouped['TELUGU NAME'] = ''
+                grouped['TELUGU NAME'] = grouped['TELUGU NAME'].fillna('')
+                # PRICE and QUANTITY are float64, so TOTAL is missing wherever the price is
+                grouped['TOTAL'] = grouped['PRICE'] * grouped['QUANTITY']
                 # Format columns for display
-                grouped['Quantity'] = grouped['QUANTITY'].astype(str) + ' ' + grouped['UNITS'].astype(str)
-                display_cols = ['PIVOT_VEGETABLE_NAME', 'Quantity', 'PRICE', 'TOTAL']
-                display_df = grouped[display_cols].rename(columns={
-                    'PIVOT_VEGETABLE_NAME': 'Vegetable Name'
+                display_df = pd.DataFrame({
+                    'Vegetable Name': grouped['PIVOT_VEGETABLE_NAME'],
+                    'Quantity': [format_quantity(qty, units) for qty, units in zip(grouped['QUANTITY'], grouped['UNITS'])],
+                    'PRICE': [format_amount(price) for price in grouped['PRICE']],
+                    'TOTAL': [format_amount(total) for total in grouped['TOTAL']],
                 })
                 st.dataframe(display_df, use_container_width=True)
                 # Show summary
                 total_items = len(display_df)
-                grand_total = 0
-                for t in display_df['TOTAL']:
-                    try:
-                        if t and str(t).strip():
-                            grand_total += float(t)
-                    except:
-                        pass
+                grand_total = grouped['TOTAL'].sum()
                 st.markdown(f"**Total Items: {total_items} | Grand Total: {grand_total:.2f}**")
                 # Prepare DataFrame for PDF (match main bill module)
-                pdf_df = grouped.copy()
-                pdf_df['MAIN HOTEL NAME'] = selected_hotel
-                pdf_df['KITCHEN NAME'] = kitchen
-                pdf_df['DATE'] = selected_date
-                pdf_df['PIVOT_VEGETABLE_NAME'] = grouped['PIVOT_VEGETABLE_NAME']
-                pdf_df['UNITS'] = grouped['UNITS']
-                # Use TELUGU NAME from kitchen_df if available
-                if 'TELUGU NAME' in kitchen_df.columns:
-                    telugu_map = kitchen_df.set_index(['PIVOT_VEGETABLE_NAME', 'UNITS'])['TELUGU NAME'].to_dict()
-                    pdf_df['TELUGU NAME'] = grouped.apply(lambda row: telugu_map.get((row['PIVOT_VEGETABLE_NAME'], row['UNITS']), ''), axis=1)
-                else:
-                    pdf_df['TELUGU NAME'] = ''
-                pdf_df['QUANTITY'] = grouped['QUANTITY']
-                pdf_df['PRICE'] = grouped['PRICE']
-                # Reorder columns to match main bill module
-                pdf_df = pdf_df[['MAIN HOTEL NAME', 'KITCHEN NAME', 'DATE', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME', 'QUANTITY', 'PRICE']]
+                pdf_df = grouped.assign(
+                    **{'MAIN HOTEL NAME': selected_hotel, 'KITCHEN NAME': kitchen, 'DATE': selected_date}
+                )[['MAIN HOTEL NAME', 'KITCHEN NAME', 'DATE', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME', 'QUANTITY', 'PRICE']]
                 # Download as PDF (trigger immediately)
                 pdf_buffer = create_kitchen_bills_pdf(pdf_df, selected_date)
                 st.download_button(
@@ -137,23 +118,8 @@ def show_editable_bills_section():
             if all_changes:
                 if st.button("Save Changes to Google Sheet", key="save_changes_gsheet"):
                     try:
-                        SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
                         SPREADSHEET_ID = st.secrets.general.id
-                        credentials = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"],scopes=SCOPES)
-                        service = build('sheets', 'v4', credentials=credentials)
-                        sheet = service.spreadsheets()
                         change_sheet = "change"
-                        # Check if sheet exists
-                        sheets_metadata = sheet.get(spreadsheetId=SPREADSHEET_ID).execute()
-                        sheet_names = [s['properties']['title'] for s in sheets_metadata['sheets']]
-                        if change_sheet not in sheet_names:
-                            requests = [{
-                                'addSheet': {
-                                    'properties': {'title': change_sheet}
-                                }
-                            }]
-                            body = {'requests': requests}
-                            service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body=body).execute()
                         # For each changed row, find the original row in the main sheet and add row number and changed quantity
                         main_df = get_google_sheets_data()
                         main_df = main_df.reset_index().rename(columns={'index': 'ROW_NUMBER'})
@@ -197,29 +163,10 @@ def show_editable_bills_section():
                             if col in main_df.columns:
                                 main_df.drop(columns=[col], inplace=True)
                         if save_rows:
-                            # Add header if new sheet
-                            result = sheet.values().get(
-                                spreadsheetId=SPREADSHEET_ID,
-                                range=f"{change_sheet}!A1"
-                            ).execute()
-                            existing_values = result.get('values', [])
-                            if not existing_values:
-                                header = list(save_rows[0].keys())
-                                sheet.values().update(
-                                    spreadsheetId=SPREADSHEET_ID,
-                                    range=f"{change_sheet}!A1",
-                                    valueInputOption='RAW',
-                                    body={'values': [header]}
-                                ).execute()
-                            # Append changes
-                            values = [list(row.values()) for row in save_rows]
-                            sheet.values().append(
-                                spreadsheetId=SPREADSHEET_ID,
-                                range=f"{change_sheet}!A1",
-                                valueInputOption='RAW',
-                                insertDataOption='INSERT_ROWS',
-                                body={'values': values}
-                            ).execute()
+                            # One append (or, for a new sheet, one batchUpdate with the header) per save.
+                            # Derived snapshot columns are not part of the sheet's layout.
+                            save_df = pd.DataFrame(save_rows).drop(columns=DERIVED_COLUMNS, errors='ignore')
+                            get_sheets_writer(SPREADSHEET_ID).append_frame(change_sheet, save_df)
                             st.success(f"Saved {len(save_rows)} changed rows to Google Sheet 'change'.")
                         else:
                             st.info("No matching rows found in main sheet for changes.")
@@ -5,60 +5,30 @@ import base64
 import json
 import tempfile
 import os
-from pymongo import MongoClient
+from database.mongodb import get_database
 from groq import Groq
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from utils.sheets_client import get_sheets_writer
+from utils.validation import KNOWN_HOTELS, KNOWN_KITCHENS
 
 # ---------- GOOGLE SHEETS CONFIGURATION ----------
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SPREADSHEET_ID = st.secrets.general.id
 SHEET_NAMES = ['Sheet16']
 
-def get_sheets_service():
-    creds = Credentials.from_service_account_info(st.secrets["google_service_account"], scopes=SCOPES)
-    return build('sheets', 'v4', credentials=creds)
-
 def append_to_google_sheets_batch(data_df, sheet_name='Sheet16'):
     try:
-        service = get_sheets_service()
-        # Get the current sheet data to find the last row
-        try:
-            result = service.spreadsheets().values().get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=f"{sheet_name}!A:A"
-            ).execute()
-            existing_values = result.get('values', [])
-            last_row = len(existing_values) if existing_values else 0
-        except Exception:
-            last_row = 0
-        values_to_append = []
-        if last_row == 0:
-            values_to_append.append(data_df.columns.tolist())
-            last_row = 1
-        for _, row in data_df.iterrows():
-            values_to_append.append(row.tolist())
-        body = {'values': values_to_append}
-        result = service.spreadsheets().values().append(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"{sheet_name}!A:A",
-            valueInputOption='RAW',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
+        # One append per save - the writer knows whether the sheet already has its header
+        result = get_sheets_writer(SPREADSHEET_ID).append_frame(sheet_name, data_df)
         updates = result.get('updates', {})
-        rows_added = len(values_to_append)
-        return True, f"Successfully appended {rows_added} rows to Google Sheets. Updated range: {updates.get('updatedRange', 'Unknown')}"
+        return True, f"Successfully appended {len(data_df)} rows to Google Sheets. Updated range: {updates.get('updatedRange', sheet_name)}"
     except Exception as e:
         return False, f"Error appending to Google Sheets: {str(e)}"
 
 # ---------- MONGODB SETUP ----------
-client = MongoClient(st.secrets['mongodb']['connection_string'])
-db = client["hotel_orders"]
+# The process-wide client is created on first use - importing this module doesn't connect
 
 def get_vegetable_names_by_hotel(hotel_name):
     try:
-        master_veg_collection = db["master_veg_name"]
+        master_veg_collection = get_database()["master_veg_name"]
         vegetable_docs = master_veg_collection.find({"HOTEL_NAME": hotel_name.upper()})
         vegetable_list = [doc.get("HOTEL_SPECIFIC_NAME", "") for doc in vegetable_docs]
         return vegetable_list
@@ -68,7 +38,7 @@ def get_vegetable_names_by_hotel(hotel_name):
 
 def get_vegetable_mapping_by_hotel(hotel_name):
     try:
-        master_veg_collection = db["master_veg_name"]
+        master_veg_collection = get_database()["master_veg_name"]
         vegetable_docs = master_veg_collection.find({"HOTEL_NAME": hotel_name.upper()})
         vegetable_mapping = {}
         for doc in vegetable_docs:
@@ -228,13 +198,12 @@ def image_txt_to_order_ui():
         date_input = st.date_input("Select Date", datetime.date.today() + datetime.timedelta(days=1))
         hotel_name = st.selectbox(
             'Hotel Name',
-            ('NOVOTEL', 'GRANDBAY', 'RADISSONBLU', 'BHEEMILI')
+            KNOWN_HOTELS
         )
     with col2:
         kitchen_name = st.selectbox(
             'Kitchen Name',
-            ('EATS', 'BANQUETS KITCHEN', 'STAFF CANTEEN', 'GRANDBAY', 'MAIN KITCHEN', 
-             'ZAFFRAN KITCHEN', 'BHEEMILI NOVOTEL', 'BHEEMILI MAIN KITCHEN', 'INFINTY KITCHEN')
+            KNOWN_KITCHENS
         )
     st.write(f'Selected Hotel: **{hotel_name}** | Kitchen: **{kitchen_name}**')
     st.subheader("📝 Text Instructions")
@@ -338,7 +307,7 @@ def image_txt_to_order_ui():
         with col1:
             if st.button("📊 Export to MongoDB", use_container_width=True):
                 try:
-                    audit_collection = db["audits"]
+                    audit_collection = get_database()["audits"]
                     records = edited_df[['DATE', 'MAIN_HOTEL_NAME', 'KITCHEN_NAME', 'PIVOT_VEGETABLE_NAME', 'QUANTITY']].to_dict("records")
                     audit_collection.insert_many(records)
                     st.success("✅ Data exported to MongoDB successfully!")
@@ -365,7 +334,7 @@ def image_txt_to_order_ui():
             st.rerun()
     with st.expander("📈 Recent Orders"):
         try:
-            audit_collection = db["audits"]
+            audit_collection = get_database()["audits"]
             recent_orders = list(audit_collection.find().sort("_id", -1).limit(10))
             if recent_orders:
                 recent_df = pd.DataFrame(recent_orders)
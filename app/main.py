@@ -1,17 +1,24 @@
 import streamlit as st
 import pandas as pd
 import io
+import zipfile
 from datetime import datetime, timedelta
 import os
 
 # Import modules
-from utils.sheets import get_google_sheets_data
-from utils.data_processing import process_data_for_date, create_vegetable_report_data, create_vendor_report_data
-from database.mongodb import push_data_to_mongodb, get_vegetable_prices, save_vegetable_prices
+from utils.sheets import get_google_sheets_data, refresh_google_sheets_data, get_sheet_data_age
+from utils.data_processing import ORDER_CUBE_COLUMNS, process_data_for_date, process_data_for_range, build_order_cube, build_daily_order_cubes, compute_daily_totals, summarize_vegetables, create_vegetable_report_data, create_vendor_report_data, get_issues_table, get_day_issues
+from utils.sheets_client import get_sheets_scheduler
+from utils.schema import DERIVED_COLUMNS
+from utils.revisions import get_sheet_revision
+from database.mongodb import push_data_to_mongodb, get_vegetable_prices, save_vegetable_prices, get_database, get_index_diagnostics
+from database.aggregations import aggregate_daily_totals, aggregate_kitchen_spend, aggregate_vegetable_quantities
+from database.order_store import get_order_store
 from reports.individual_reports import create_individual_hotel_reports_pdf
 from reports.combined_reports import create_combined_report_pdf
 from reports.bills_reports import create_kitchen_bills_pdf, create_kitchen_bills_preview
 from reports.hotel_summary import create_hotel_summary_pdf
+from reports.formatting import format_quantity_report, format_kitchen_bill
 from img_to_txt_module import image_txt_to_order_ui
 from editable_bills_module import show_editable_bills_section
 
@@ -34,6 +41,26 @@ def check_password():
     else:
         return True
 
+def format_snapshot_age(seconds):
+    """Describe a snapshot age for display, e.g. 'just now' or '12 min ago'"""
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    return f"{int(seconds // 3600)} h ago"
+
+def show_order_sources(sources):
+    """Caption naming where the orders on a page came from (see OrderStore.get_orders)"""
+    if sources['error']:
+        st.warning(f"Could not read orders from MongoDB: {sources['error']}")
+    if sources['mongodb'] and sources['sheets']:
+        st.caption(f"Orders for {', '.join(sources['mongodb'])} loaded from MongoDB (as of their last push), "
+                   f"the rest from Google Sheets")
+    elif sources['mongodb']:
+        st.caption("Orders loaded from MongoDB (as of the last push)")
+    elif sources['sheets']:
+        st.caption("Orders loaded from Google Sheets")
+
 def main():
     if not check_password():
         return  # Stop app from loading unless authenticated
@@ -51,6 +78,14 @@ def main():
     st.sidebar.title("Navigation")
     page = st.sidebar.selectbox("Choose a page:", ["Home", "Data Preview", "Price Management", "Bills", "Edit Bill", "Image/Text to Order"])
     
+    # Sheet data is served from the last snapshot and refreshed in the background
+    snapshot_age, refreshing = get_sheet_data_age()
+    if snapshot_age is not None:
+        st.sidebar.caption(f"Sheet data updated {format_snapshot_age(snapshot_age)}" + (" · refreshing..." if refreshing else ""))
+    sheets_stats = get_sheets_scheduler().stats()
+    if sheets_stats['sent']:
+        st.sidebar.caption(f"Sheets API: {sheets_stats['sent']} requests · {sheets_stats['throttled']} throttled · {sheets_stats['coalesced']} shared")
+    
     if page == "Home":
         st.header("Generate Reports")
         
@@ -63,14 +98,51 @@ def main():
                 help="Select the date for which you want to generate reports"
             )
         
+        with col2:
+            batch_mode = st.checkbox("Generate for a date range", help="Generate daily reports for every day in a range as one download")
+            if batch_mode:
+                end_date = st.date_input(
+                    "End Date:",
+                    value=selected_date,
+                    min_value=selected_date,
+                    help="Reports are generated for every day from the selected date to this date"
+                )
+        
         with col3:
             if st.button("🔄 Fetch Latest Data", help="Refresh data from Google Sheets"):
-                st.cache_data.clear()
-                st.success("Data refreshed from Google Sheets!")
-                st.rerun()
+                with st.spinner("Fetching latest data from Google Sheets..."):
+                    success, message = refresh_google_sheets_data()
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+        
+        if batch_mode:
+            # Batch mode - one download bundle for the whole range
+            if st.button("🔄 Generate Reports for Range", type="primary"):
+                with st.spinner("Generating reports for each day in the range..."):
+                    df = get_google_sheets_data()
+                    
+                    if df.empty:
+                        st.error("Failed to fetch data from Google Sheets.")
+                    else:
+                        bundle_buffer, report_days = generate_reports_for_range(df, selected_date, end_date)
+                        
+                        if bundle_buffer:
+                            st.success(f"Reports generated for {len(report_days)} day(s) with orders")
+                            st.download_button(
+                                label="📦 Download Reports Bundle",
+                                data=bundle_buffer.getvalue(),
+                                file_name=f"reports_{selected_date.strftime('%Y%m%d')}_to_{end_date.strftime('%Y%m%d')}.zip",
+                                mime="application/zip",
+                                help="Downloads the summary report, individual hotel reports and kitchen bills for each day"
+                            )
+                        else:
+                            st.warning("No data found for the selected date range.")
         
         # Generate reports button
-        if st.button("🔄 Generate Reports", type="primary"):
+        elif st.button("🔄 Generate Reports", type="primary"):
             # Initialize progress tracking
             progress_bar = st.progress(0)
             status_text = st.empty()
@@ -92,7 +164,7 @@ def main():
                 
                 try:
                     # Generate reports
-                    veg_report_data, vendor_report_data, combined_pdf_buffer, individual_hotel_pdf_buffer, kitchen_bills_pdf_buffer, kitchen_bills_preview = generate_reports(df, selected_date)
+                    veg_report_data, vendor_report_data, combined_pdf_buffer, individual_hotel_pdf_buffer, kitchen_bills_pdf_buffer, kitchen_bills_preview = get_reports(df, selected_date)
                     
                     # Step 4: Complete
                     status_text.text("Step 4/4: Finalizing...")
@@ -103,6 +175,12 @@ def main():
                         status_text.text("✅ Reports generated successfully!")
                         st.success(f"Data processed successfully for {selected_date}")
                         
+                        # Rows for this date with data-quality issues
+                        day_issues = get_day_issues(df, selected_date)
+                        if not day_issues.empty:
+                            with st.expander(f"⚠️ {len(day_issues)} data quality issue(s) for this date"):
+                                st.dataframe(day_issues, use_container_width=True)
+                        
                         col1, col2 = st.columns(2)
                         with col1:
                             st.metric("Total Vegetables", len(veg_report_data))
@@ -156,13 +234,13 @@ def main():
                         
                         # Preview data
                         with st.expander("🔍 Preview Vegetable Report Data (Sorted Alphabetically)"):
-                            st.dataframe(veg_report_data, use_container_width=True)
+                            st.dataframe(format_quantity_report(veg_report_data), use_container_width=True)
                         
                         if vendor_report_data:
                             with st.expander("🔍 Preview Vendor Report Data (Sorted Alphabetically)"):
                                 for vendor, data in vendor_report_data.items():
                                     st.subheader(f"Vendor: {vendor}")
-                                    st.dataframe(data, use_container_width=True)
+                                    st.dataframe(format_quantity_report(data), use_container_width=True)
                     else:
                         st.warning("No data found for the selected date.")
                 
@@ -196,15 +274,17 @@ def main():
             with col3:
                 st.metric("Unique Vegetables", df['PIVOT_VEGETABLE_NAME'].nunique() if 'PIVOT_VEGETABLE_NAME' in df.columns else 0)
             
+            # Data-quality issues flagged when the sheet was loaded
+            issues_df = get_issues_table(df)
+            if not issues_df.empty:
+                with st.expander(f"⚠️ Data Quality Issues ({len(issues_df)})"):
+                    st.write("Rows with missing or invalid values. Rows without a valid date or quantity are left out of reports.")
+                    st.dataframe(issues_df, use_container_width=True)
+            
             # Add filters
             st.subheader("🔍 Filter Data")
             
-            # Convert DATE column to datetime if needed
-            if 'DATE' in df.columns:
-                try:
-                    df['DATE'] = pd.to_datetime(df['DATE'], format='%d/%m/%Y', errors='coerce')
-                except Exception as e:
-                    st.warning(f"Error converting dates: {str(e)}")
+            # DATE is already parsed to datetime64 at ingestion
             
             # Create filters in columns
             filter_col1, filter_col2 = st.columns(2)
@@ -270,7 +350,7 @@ def main():
             
             # Display filtered data
             st.subheader("Filtered Data")
-            st.dataframe(df_filtered, use_container_width=True, height=400)
+            st.dataframe(df_filtered.drop(columns=DERIVED_COLUMNS, errors='ignore'), use_container_width=True, height=400)
             
             # Hotel summary section
             if not df_filtered.empty and 'MAIN HOTEL NAME' in df_filtered.columns:
@@ -280,25 +360,39 @@ def main():
                 # Get unique hotels
                 unique_hotels = sorted(df_filtered['MAIN HOTEL NAME'].unique())
                 
+                by_kitchen = st.checkbox("Break down totals by kitchen", value=False)
+                use_mongodb = st.checkbox(
+                    "Compute totals in MongoDB (pushed orders only)", value=False,
+                    help="Aggregates the order history pushed to MongoDB on the server - suited to month or year ranges"
+                )
+                
+                # Get the date for the summary
+                date_range = selected_date_range
+                
+                # Daily totals for every hotel in one pass - each PDF renders its slice
+                if use_mongodb:
+                    try:
+                        db = get_database()
+                        daily_totals = aggregate_daily_totals(db, start_date, end_date, by_kitchen=by_kitchen, hotels=unique_hotels)
+                        with st.expander("🗄️ MongoDB Spend Summary"):
+                            st.write("**Spend by kitchen:**")
+                            st.dataframe(aggregate_kitchen_spend(db, start_date, end_date, hotels=unique_hotels), use_container_width=True)
+                            st.write("**Quantities by vegetable:**")
+                            st.dataframe(aggregate_vegetable_quantities(db, start_date, end_date, hotels=unique_hotels), use_container_width=True)
+                    except Exception as e:
+                        st.error(f"Error aggregating orders in MongoDB: {str(e)}")
+                        daily_totals = compute_daily_totals(df_filtered, start_date, end_date, by_kitchen=by_kitchen)
+                else:
+                    daily_totals = compute_daily_totals(df_filtered, start_date, end_date, by_kitchen=by_kitchen)
+                
                 # Create a grid of download buttons (3 per row)
                 cols = st.columns(3)
                 
                 for i, hotel in enumerate(unique_hotels):
                     with cols[i % 3]:
-                        # Filter data for this hotel
-                        hotel_data = df_filtered[df_filtered['MAIN HOTEL NAME'] == hotel]
-                        
-                        if not hotel_data.empty:
-                            # Get the date for the summary
-                            if isinstance(selected_date_range, tuple) and len(selected_date_range) == 2:
-                                # Use the full date range
-                                date_range = selected_date_range
-                            else:
-                                # If single date, use that date
-                                date_range = selected_date_range
-                            
+                        if hotel in daily_totals.columns:
                             # Create hotel summary PDF
-                            hotel_summary_buffer = create_hotel_summary_pdf(hotel_data, date_range, hotel)
+                            hotel_summary_buffer = create_hotel_summary_pdf(df_filtered, date_range, hotel, daily_totals=daily_totals)
                             
                             if hotel_summary_buffer:
                                 # Determine file name based on date range
@@ -320,10 +414,42 @@ def main():
                 st.write("**Columns in the dataset:**")
                 for i, col in enumerate(df.columns, 1):
                     st.write(f"{i}. {col}")
+            
+            # Days pushed to MongoDB are served from there - check they still match the sheet
+            with st.expander("🔄 MongoDB / Google Sheets Consistency"):
+                if st.button("Check Consistency for Selected Dates"):
+                    try:
+                        consistency_df = get_order_store().check_consistency(start_date, end_date)
+                        if consistency_df.empty:
+                            st.info("No orders in the selected dates.")
+                        else:
+                            out_of_date = consistency_df[consistency_df['STATUS'] != 'in sync']
+                            if out_of_date.empty:
+                                st.success("✅ All pushed days match Google Sheets.")
+                            else:
+                                st.warning(f"{len(out_of_date)} day(s) differ - push them to MongoDB again from the Home page.")
+                            st.dataframe(consistency_df, use_container_width=True)
+                    except Exception as e:
+                        st.error(f"Error checking consistency: {str(e)}")
+            
+            # Confirm MongoDB queries are served from indexes as history grows
+            with st.expander("🗄️ MongoDB Index Diagnostics"):
+                if st.button("Explain MongoDB Queries"):
+                    try:
+                        latest_date = df['DATE'].max()
+                        sample_date = (latest_date if pd.notna(latest_date) else datetime.now()).strftime('%Y-%m-%d')
+                        hotels = sorted(df['MAIN HOTEL NAME'].dropna().unique())
+                        sample_hotel = hotels[0] if hotels else ''
+                        index_report, explain_rows = get_index_diagnostics(sample_date, sample_hotel)
+                        st.write(f"**Indexes** (queries explained for {sample_date}, {sample_hotel or 'no hotel'}):")
+                        st.dataframe(pd.DataFrame(index_report), use_container_width=True)
+                        st.dataframe(pd.DataFrame(explain_rows), use_container_width=True)
+                    except Exception as e:
+                        st.error(f"Error explaining MongoDB queries: {str(e)}")
                     
             # Option to download filtered data
             if not df_filtered.empty:
-                csv = df_filtered.to_csv(index=False).encode('utf-8')
+                csv = df_filtered.drop(columns=DERIVED_COLUMNS, errors='ignore').to_csv(index=False).encode('utf-8')
                 st.download_button(
                     label="📥 Download Filtered Data as CSV",
                     data=csv,
@@ -349,14 +475,23 @@ def main():
         with col2:
             fetch_data = st.button("🔄 Fetch Latest Data", help="Refresh data from Google Sheets")
             if fetch_data:
-                st.cache_data.clear()
-                st.success("Data refreshed from Google Sheets!")
-                st.rerun()
+                with st.spinner("Fetching latest data from Google Sheets..."):
+                    success, message = refresh_google_sheets_data()
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
         
-        # Get data
+        # Get data - from Google Sheets, or the copy pushed to MongoDB when asked for
+        use_mongodb = st.checkbox(
+            "Use orders pushed to MongoDB", value=False, key="prices_use_mongodb",
+            help="Reads the day from MongoDB as it was last pushed - Fetch Latest Data does not update it"
+        )
         with st.spinner("Loading data..."):
-            df = get_google_sheets_data()
-            filtered_df, _ = process_data_for_date(df, selected_date)
+            filtered_df, order_sources = get_order_store().get_orders(
+                selected_date, selected_date, columns=ORDER_CUBE_COLUMNS, prefer_mongodb=use_mongodb)
+            show_order_sources(order_sources)
             
             # Get existing prices from MongoDB
             existing_prices = get_vegetable_prices(selected_date)
@@ -368,8 +503,8 @@ def main():
                 st.info("ℹ️ No saved prices found for this date. Enter prices below.")
         
         if not filtered_df.empty:
-            # Get unique vegetables with Telugu names
-            veg_data = filtered_df[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
+            # Get unique vegetables with Telugu names, display names and sheet prices from the order cube
+            veg_data = summarize_vegetables(filtered_df)
             veg_data = veg_data.sort_values('PIVOT_VEGETABLE_NAME')
             
             # Create price input form
@@ -382,21 +517,10 @@ def main():
                     veg_name = row['PIVOT_VEGETABLE_NAME']
                     units = row['UNITS']
                     telugu_name = row['TELUGU NAME'] if pd.notna(row['TELUGU NAME']) else ""
+                    display_name = row['DISPLAY_NAME']
                     
                     # Get price from Google Sheets if available
-                    sheets_price = ""
-                    if 'PRICE' in filtered_df.columns:
-                        price_from_sheets = filtered_df[(filtered_df['PIVOT_VEGETABLE_NAME'] == veg_name) & 
-                                                      (filtered_df['UNITS'] == units)]['PRICE'].values
-                        if len(price_from_sheets) > 0 and pd.notna(price_from_sheets[0]):
-                            sheets_price = price_from_sheets[0]
-                    
-                    # Create display name that includes units if there are multiple unit types for same vegetable
-                    veg_units_count = filtered_df[filtered_df['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-                    if veg_units_count > 1:
-                        display_name = f"{veg_name} ({units})"
-                    else:
-                        display_name = veg_name
+                    sheets_price = row['PRICE'] if pd.notna(row['PRICE']) else ""
                     
                     # Check if price exists in MongoDB
                     existing_price = ""
@@ -473,21 +597,32 @@ def main():
         with col2:
             fetch_data = st.button("🔄 Fetch Latest Data", help="Refresh data from Google Sheets")
             if fetch_data:
-                st.cache_data.clear()
-                st.success("Data refreshed from Google Sheets!")
-                st.rerun()
-        # Get data
+                with st.spinner("Fetching latest data from Google Sheets..."):
+                    success, message = refresh_google_sheets_data()
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+        # Get data - from Google Sheets, or the copy pushed to MongoDB when asked for
+        use_mongodb = st.checkbox(
+            "Use orders pushed to MongoDB", value=False, key="bills_use_mongodb",
+            help="Reads the day from MongoDB as it was last pushed - Fetch Latest Data does not update it"
+        )
         with st.spinner("Loading data..."):
-            df = get_google_sheets_data()
-            filtered_df, _ = process_data_for_date(df, selected_date)
+            filtered_df, order_sources = get_order_store().get_orders(
+                selected_date, selected_date, columns=ORDER_CUBE_COLUMNS, prefer_mongodb=use_mongodb)
+            show_order_sources(order_sources)
             if filtered_df.empty:
                 st.warning(f"No data found for date: {selected_date.strftime('%Y-%m-%d')}")
             else:
+                # Aggregate the day once for both the preview and the PDF
+                order_cube = build_order_cube(filtered_df)
                 # Generate kitchen bills preview
-                kitchen_bills_preview = create_kitchen_bills_preview(filtered_df, selected_date)
+                kitchen_bills_preview = create_kitchen_bills_preview(order_cube, selected_date)
                 if kitchen_bills_preview:
                     # Generate PDF for download
-                    kitchen_bills_pdf_buffer = create_kitchen_bills_pdf(filtered_df, selected_date)
+                    kitchen_bills_pdf_buffer = create_kitchen_bills_pdf(order_cube, selected_date)
                     # Download button
                     if kitchen_bills_pdf_buffer:
                         st.download_button(
@@ -504,8 +639,8 @@ def main():
                         with st.expander(f"Hotel: {hotel}", expanded=True):
                             for kitchen, kitchen_data in kitchens.items():
                                 st.markdown(f"#### Kitchen: {kitchen}")
-                                st.dataframe(kitchen_data['data'], use_container_width=True)
-                                st.markdown(f"**Grand Total: {kitchen_data['grand_total']}**")
+                                st.dataframe(format_kitchen_bill(kitchen_data['data']), use_container_width=True)
+                                st.markdown(f"**Grand Total: {kitchen_data['grand_total']:.2f}**")
                                 st.markdown("---")
                 else:
                     st.warning("No kitchen bills data available for the selected date.")
@@ -515,33 +650,102 @@ def main():
     elif page == "Image/Text to Order":
         image_txt_to_order_ui()
 
+def _build_reports(df, selected_date):
+    """All reports for the selected date - errors are raised, so cached callers don't keep failures"""
+    # Process data for the selected date
+    filtered_df, _ = process_data_for_date(df, selected_date)
+    
+    if filtered_df.empty:
+        return None, None, None, None, None, None
+    
+    # Aggregate the day once - the PDF and bill builders slice this cube
+    order_cube = build_order_cube(filtered_df)
+    
+    # Create report data structures - quantity reports sum the day's rows in sheet order
+    veg_report_data = create_vegetable_report_data(filtered_df)
+    vendor_report_data = create_vendor_report_data(filtered_df)
+    
+    # Generate PDFs
+    combined_pdf_buffer = create_combined_report_pdf(veg_report_data, vendor_report_data, selected_date)
+    individual_hotel_pdf_buffer = create_individual_hotel_reports_pdf(order_cube, selected_date)
+    kitchen_bills_pdf_buffer = create_kitchen_bills_pdf(order_cube, selected_date)
+    
+    # Create kitchen bills preview data
+    kitchen_bills_preview = create_kitchen_bills_preview(order_cube, selected_date)
+    
+    return veg_report_data, vendor_report_data, combined_pdf_buffer, individual_hotel_pdf_buffer, kitchen_bills_pdf_buffer, kitchen_bills_preview
+
+def _show_report_error(e):
+    st.error(f"Error generating reports: {str(e)}")
+    import traceback
+    st.error(traceback.format_exc())
+
 def generate_reports(df, selected_date):
     """Generate all reports for the selected date"""
     try:
-        # Process data for the selected date
-        filtered_df, _ = process_data_for_date(df, selected_date)
-        
-        if filtered_df.empty:
-            return None, None, None, None, None, None
+        return _build_reports(df, selected_date)
+    except Exception as e:
+        _show_report_error(e)
+        return None, None, None, None, None, None
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _get_cached_reports(sheet_revision, selected_date, _df):
+    """Reports for one date, cached per sheet revision - a refresh that brings no new data keeps them.
+    
+    Failures raise out of here, so they are not cached and the next run tries again.
+    """
+    return _build_reports(_df, selected_date)
+
+def get_reports(df, selected_date):
+    """Generate all reports for the selected date, reusing them while the sheet data is unchanged"""
+    sheet_revision = get_sheet_revision(df)
+    if sheet_revision is None:
+        return generate_reports(df, selected_date)
+    try:
+        return _get_cached_reports(sheet_revision, selected_date, df)
+    except Exception as e:
+        _show_report_error(e)
+        return None, None, None, None, None, None
+
+def generate_reports_for_range(df, start_date, end_date):
+    """Generate the daily PDFs for every day in a date range as one zip bundle.
+    
+    The range is filtered and aggregated once; each day's reports render from its own order cube.
+    Returns the zip buffer (None when the range has no orders) and the days included.
+    """
+    try:
+        # Filter and aggregate the whole range once
+        range_df = process_data_for_range(df, start_date, end_date)
+        daily_cubes = build_daily_order_cubes(range_df)
         
-        # Create report data structures
-        veg_report_data = create_vegetable_report_data(filtered_df)
-        vendor_report_data = create_vendor_report_data(filtered_df)
+        if not daily_cubes:
+            return None, []
         
-        # Generate PDFs
-        combined_pdf_buffer = create_combined_report_pdf(veg_report_data, vendor_report_data, selected_date)
-        individual_hotel_pdf_buffer = create_individual_hotel_reports_pdf(filtered_df, selected_date)
-        kitchen_bills_pdf_buffer = create_kitchen_bills_pdf(filtered_df, selected_date)
+        # Quantity reports sum each day's rows in sheet order
+        daily_rows = {day.date(): rows for day, rows in range_df.groupby(range_df['DATE'].dt.normalize(), sort=True)}
         
-        # Create kitchen bills preview data
-        kitchen_bills_preview = create_kitchen_bills_preview(filtered_df, selected_date)
+        bundle_buffer = io.BytesIO()
+        with zipfile.ZipFile(bundle_buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+            for report_date, order_cube in daily_cubes.items():
+                date_str = report_date.strftime('%Y%m%d')
+                
+                veg_report_data = create_vegetable_report_data(daily_rows[report_date])
+                vendor_report_data = create_vendor_report_data(daily_rows[report_date])
+                
+                pdf_buffers = {
+                    f"complete_order_report_{date_str}.pdf": create_combined_report_pdf(veg_report_data, vendor_report_data, report_date),
+                    f"individual_hotel_reports_{date_str}.pdf": create_individual_hotel_reports_pdf(order_cube, report_date),
+                    f"kitchen_bills_{date_str}.pdf": create_kitchen_bills_pdf(order_cube, report_date),
+                }
+                for file_name, pdf_buffer in pdf_buffers.items():
+                    if pdf_buffer:
+                        bundle.writestr(f"{date_str}/{file_name}", pdf_buffer.getvalue())
         
-        return veg_report_data, vendor_report_data, combined_pdf_buffer, individual_hotel_pdf_buffer, kitchen_bills_pdf_buffer, kitchen_bills_preview
+        bundle_buffer.seek(0)
+        return bundle_buffer, list(daily_cubes)
     except Exception as e:
         st.error(f"Error generating reports: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
-        return None, None, None, None, None, None
+        return None, []
 
 if __name__ == "__main__":
     main()
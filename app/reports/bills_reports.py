@@ -9,9 +9,9 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils.sheets import get_google_sheets_data
-from utils.data_processing import process_data_for_date
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+from utils.data_processing import process_data_for_date, summarize_vegetables
+from .formatting import format_kitchen_bill
+from utils.sheets_client import get_sheets_writer
 
 # Register Telugu font if needed
 try:
@@ -21,6 +21,35 @@ try:
 except Exception as e:
     st.warning(f"Could not register Telugu font: {str(e)}")
 
+def _build_kitchen_bills(df):
+    """Slice the order cube into a bill per hotel and kitchen - hotels and kitchens sorted alphabetically.
+    
+    Each bill is a DataFrame with float64 Quantity, PRICE and TOTAL columns (missing prices stay NaN).
+    """
+    summary = summarize_vegetables(df, by=['MAIN HOTEL NAME', 'KITCHEN NAME'])
+    kitchen_summaries = dict(tuple(summary.groupby(['MAIN HOTEL NAME', 'KITCHEN NAME'], sort=False, observed=True)))
+    
+    bills = {}
+    for hotel in sorted(summary['MAIN HOTEL NAME'].unique()):
+        hotel_kitchens = summary.loc[summary['MAIN HOTEL NAME'] == hotel, 'KITCHEN NAME'].unique()
+        bills[hotel] = {}
+        for kitchen in sorted(hotel_kitchens):
+            kitchen_data = kitchen_summaries[(hotel, kitchen)]
+            
+            # Only include items with quantity > 0, sorted alphabetically by vegetable name
+            kitchen_items = kitchen_data[kitchen_data['QUANTITY'] > 0].sort_values('DISPLAY_NAME', kind='mergesort')
+            bills[hotel][kitchen] = pd.DataFrame({
+                'Vegetable Name': kitchen_items['DISPLAY_NAME'],
+                'Telugu Name': kitchen_items['TELUGU NAME'],
+                'Quantity': kitchen_items['QUANTITY'],
+                'UNITS': kitchen_items['UNITS'],
+                'PRICE': kitchen_items['PRICE'],
+                # Total amount is only available when the price is
+                'TOTAL': kitchen_items['PRICE'] * kitchen_items['QUANTITY'],
+            }).reset_index(drop=True)
+    
+    return bills
+
 def create_kitchen_bills_pdf(df, selected_date):
     """Generate PDF with bills for each kitchen - sorted alphabetically by vegetable name"""
     if df.empty:
@@ -79,20 +108,13 @@ def create_kitchen_bills_pdf(df, selected_date):
         textColor=colors.red
     )
     
-    # Group data by hotel and kitchen
-    if 'KITCHEN NAME' not in df.columns:
-        # If KITCHEN NAME column doesn't exist, use MAIN HOTEL NAME as kitchen
-        df['KITCHEN NAME'] = df['MAIN HOTEL NAME']
-    
-    # Get unique hotels
-    hotels = sorted(df['MAIN HOTEL NAME'].unique())
+    # Bill rows for every hotel and kitchen, sliced from the order cube
+    bills = _build_kitchen_bills(df)
+    hotels = list(bills.keys())
     
     # Process each hotel
     for hotel in hotels:
-        hotel_data = df[df['MAIN HOTEL NAME'] == hotel]
-        
-        # Get unique kitchens for this hotel
-        kitchens = sorted(hotel_data['KITCHEN NAME'].unique())
+        kitchens = list(bills[hotel].keys())
         
         # Add hotel title
         hotel_title = Paragraph(f"Hotel: {hotel}", title_style)
@@ -101,7 +123,7 @@ def create_kitchen_bills_pdf(df, selected_date):
         
         # Process each kitchen
         for kitchen_idx, kitchen in enumerate(kitchens):
-            kitchen_data = hotel_data[hotel_data['KITCHEN NAME'] == kitchen]
+            kitchen_bill = bills[hotel][kitchen]
             
             # Create kitchen title
             kitchen_title = Paragraph(f"Kitchen: {kitchen}", kitchen_title_style)
@@ -109,116 +131,54 @@ def create_kitchen_bills_pdf(df, selected_date):
             # Create a list to hold all kitchen elements that should stay together
             kitchen_elements = [kitchen_title, Spacer(1, 10)]
             
-            if kitchen_data.empty:
-                kitchen_elements.append(Paragraph("No orders found for this kitchen on the selected date.", no_data_style))
-            else:
-                # Group by vegetable and sum quantities (handling multiple units)
-                kitchen_report_data = []
+            if not kitchen_bill.empty:
+                # Create table
+                table_data = [['Vegetable Name', 'Telugu Name', 'Quantity', 'PRICE', 'TOTAL']]
+                table_data.extend(format_kitchen_bill(kitchen_bill).values.tolist())
                 
-                # Get unique combinations of PIVOT_VEGETABLE_NAME and units for this kitchen
-                veg_unit_combinations = kitchen_data[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
+                # Calculate column widths
+                available_width = 7 * inch  # A4 width minus margins
+                col_widths = [2*inch, 1.5*inch, 1*inch, 1*inch, 1.5*inch]
                 
-                for _, row in veg_unit_combinations.iterrows():
-                    veg_name = row['PIVOT_VEGETABLE_NAME']
-                    units = row['UNITS']
-                    telugu_name = row['TELUGU NAME']
-                    
-                    # Filter data for this specific vegetable-unit combination
-                    veg_data = kitchen_data[(kitchen_data['PIVOT_VEGETABLE_NAME'] == veg_name) & 
-                                          (kitchen_data['UNITS'] == units)]
-                    total_qty = veg_data['QUANTITY'].sum()
+                table = Table(table_data, colWidths=col_widths)
+                table.setStyle(TableStyle([
+                    # Header styling
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 11),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
                     
-                    if total_qty > 0:  # Only include items with quantity > 0
-                        # Create display name that includes units if there are multiple unit types for same vegetable
-                        veg_units_count = kitchen_data[kitchen_data['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-                        if veg_units_count > 1:
-                            display_name = f"{veg_name} ({units})"
-                        else:
-                            display_name = veg_name
-                        
-                        # Get price if available
-                        price = ""
-                        if 'PRICE' in veg_data.columns:
-                            price_values = veg_data['PRICE'].dropna()
-                            if not price_values.empty:
-                                price = price_values.iloc[0]
-                        
-                        # Calculate total amount if price is available
-                        total = ""
-                        if price and str(price).strip() and str(price) != 'nan':
-                            try:
-                                price_float = float(price)
-                                total = price_float * total_qty
-                                total = f"{total:.2f}"
-                                price = f"{price_float:.2f}"
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        kitchen_report_data.append([
-                            display_name,
-                            telugu_name if telugu_name and str(telugu_name) != 'nan' else '',
-                            f"{total_qty} {units}",
-                            price,
-                            total
-                        ])
+                    # Data rows styling
+                    ('FONTNAME', (1, 1), (1, -1), 'NotoSansTelugu'),  # Telugu column
+                    ('FONTSIZE', (0, 1), (-1, -1), 10),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ALIGN', (2, 1), (4, -1), 'RIGHT'),  # Right align quantity, price and total columns
+                ]))
                 
-                # Sort alphabetically by vegetable name
-                kitchen_report_data.sort(key=lambda x: x[0])
+                # Add table to kitchen elements
+                kitchen_elements.append(table)
                 
-                if kitchen_report_data:
-                    # Create table
-                    table_data = [['Vegetable Name', 'Telugu Name', 'Quantity', 'PRICE', 'TOTAL']]
-                    table_data.extend(kitchen_report_data)
-                    
-                    # Calculate column widths
-                    available_width = 7 * inch  # A4 width minus margins
-                    col_widths = [2*inch, 1.5*inch, 1*inch, 1*inch, 1.5*inch]
-                    
-                    table = Table(table_data, colWidths=col_widths)
-                    table.setStyle(TableStyle([
-                        # Header styling
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 11),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                        
-                        # Data rows styling
-                        ('FONTNAME', (1, 1), (1, -1), 'NotoSansTelugu'),  # Telugu column
-                        ('FONTSIZE', (0, 1), (-1, -1), 10),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('ALIGN', (2, 1), (4, -1), 'RIGHT'),  # Right align quantity, price and total columns
-                    ]))
-                    
-                    # Add table to kitchen elements
-                    kitchen_elements.append(table)
-                    
-                    # Calculate grand total
-                    grand_total = 0
-                    for row in kitchen_report_data:
-                        if row[4] and row[4].strip():
-                            try:
-                                grand_total += float(row[4])
-                            except (ValueError, TypeError):
-                                pass
-                    
-                    # Add summary with grand total
-                    total_items = len(kitchen_report_data)
-                    summary_text = f"Total Items: {total_items} | Grand Total: {grand_total:.2f}"
-                    summary = Paragraph(summary_text, summary_style)
-                    kitchen_elements.append(Spacer(1, 20))
-                    kitchen_elements.append(summary)
-                    
-                    # Add all kitchen elements as a single KeepTogether unit
-                    story.append(KeepTogether(kitchen_elements))
-                else:
-                    kitchen_elements.append(Paragraph("No items with quantities found for this kitchen.", no_data_style))
-                    story.append(KeepTogether(kitchen_elements))
-            
+                # Calculate grand total
+                grand_total = kitchen_bill['TOTAL'].sum()
+                
+                # Add summary with grand total
+                total_items = len(kitchen_bill)
+                summary_text = f"Total Items: {total_items} | Grand Total: {grand_total:.2f}"
+                summary = Paragraph(summary_text, summary_style)
+                kitchen_elements.append(Spacer(1, 20))
+                kitchen_elements.append(summary)
+                
+                # Add all kitchen elements as a single KeepTogether unit
+                story.append(KeepTogether(kitchen_elements))
+            else:
+                kitchen_elements.append(Paragraph("No items with quantities found for this kitchen.", no_data_style))
+                story.append(KeepTogether(kitchen_elements))
+        
             # Add spacer between kitchens
             story.append(Spacer(1, 20))
             
@@ -236,105 +196,27 @@ def create_kitchen_bills_pdf(df, selected_date):
     return buffer
 
 def create_kitchen_bills_preview(df, selected_date):
-    """Create a preview of kitchen bills for Streamlit display"""
+    """Create a preview of kitchen bills for Streamlit display - numeric bill frames, formatted by the page"""
     if df.empty:
         return None
     
-    # Group data by hotel and kitchen
-    if 'KITCHEN NAME' not in df.columns:
-        # If KITCHEN NAME column doesn't exist, use MAIN HOTEL NAME as kitchen
-        df['KITCHEN NAME'] = df['MAIN HOTEL NAME']
-    
-    # Get unique hotels
-    hotels = sorted(df['MAIN HOTEL NAME'].unique())
+    # Bill rows for every hotel and kitchen, sliced from the order cube
+    bills = _build_kitchen_bills(df)
     
     # Create preview data structure
     preview_data = {}
     
     # Process each hotel
-    for hotel in hotels:
-        hotel_data = df[df['MAIN HOTEL NAME'] == hotel]
-        
-        # Get unique kitchens for this hotel
-        kitchens = sorted(hotel_data['KITCHEN NAME'].unique())
-        
+    for hotel, kitchens in bills.items():
         hotel_kitchens = {}
         
         # Process each kitchen
-        for kitchen in kitchens:
-            kitchen_data = hotel_data[hotel_data['KITCHEN NAME'] == kitchen]
-            
-            if not kitchen_data.empty:
-                # Group by vegetable and sum quantities (handling multiple units)
-                kitchen_report_data = []
-                
-                # Get unique combinations of PIVOT_VEGETABLE_NAME and units for this kitchen
-                veg_unit_combinations = kitchen_data[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
-                
-                for _, row in veg_unit_combinations.iterrows():
-                    veg_name = row['PIVOT_VEGETABLE_NAME']
-                    units = row['UNITS']
-                    telugu_name = row['TELUGU NAME']
-                    
-                    # Filter data for this specific vegetable-unit combination
-                    veg_data = kitchen_data[(kitchen_data['PIVOT_VEGETABLE_NAME'] == veg_name) & 
-                                          (kitchen_data['UNITS'] == units)]
-                    total_qty = veg_data['QUANTITY'].sum()
-                    
-                    if total_qty > 0:  # Only include items with quantity > 0
-                        # Create display name that includes units if there are multiple unit types for same vegetable
-                        veg_units_count = kitchen_data[kitchen_data['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-                        if veg_units_count > 1:
-                            display_name = f"{veg_name} ({units})"
-                        else:
-                            display_name = veg_name
-                        
-                        # Get price if available
-                        price = ""
-                        if 'PRICE' in veg_data.columns:
-                            price_values = veg_data['PRICE'].dropna()
-                            if not price_values.empty:
-                                price = price_values.iloc[0]
-                        
-                        # Calculate total amount if price is available
-                        total = ""
-                        if price and str(price).strip() and str(price) != 'nan':
-                            try:
-                                price_float = float(price)
-                                total = price_float * total_qty
-                                total = f"{total:.2f}"
-                                price = f"{price_float:.2f}"
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        kitchen_report_data.append({
-                            'Vegetable Name': display_name,
-                            'Telugu Name': telugu_name if telugu_name and str(telugu_name) != 'nan' else '',
-                            'Quantity': f"{total_qty} {units}",
-                            'PRICE': price,
-                            'TOTAL': total
-                        })
-                
-                # Sort alphabetically by vegetable name
-                kitchen_report_data.sort(key=lambda x: x['Vegetable Name'])
-                
-                if kitchen_report_data:
-                    # Convert to DataFrame for display
-                    kitchen_df = pd.DataFrame(kitchen_report_data)
-                    
-                    # Calculate grand total
-                    grand_total = 0
-                    for item in kitchen_report_data:
-                        if item['TOTAL'] and item['TOTAL'].strip():
-                            try:
-                                grand_total += float(item['TOTAL'])
-                            except (ValueError, TypeError):
-                                pass
-                    
-                    hotel_kitchens[kitchen] = {
-                        'data': kitchen_df,
-                        'grand_total': f"{grand_total:.2f}"
-                    }
+        for kitchen, kitchen_bill in kitchens.items():
+            if not kitchen_bill.empty:
+                hotel_kitchens[kitchen] = {
+                    'data': kitchen_bill,
+                    'grand_total': kitchen_bill['TOTAL'].sum()
+                }
         
         if hotel_kitchens:
             preview_data[hotel] = hotel_kitchens
@@ -401,37 +283,11 @@ if not filtered_df.empty:
                     })
             if changes:
                 try:
-                    SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
                     SPREADSHEET_ID = st.secrets.general.id
-                    credentials = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"],scopes=SCOPES)
-                    service = build('sheets', 'v4', credentials=credentials)
-                    sheet = service.spreadsheets()
                     edits_sheet = f"Edits_{selected_date.strftime('%Y%m%d')}"
-                    sheets_metadata = sheet.get(spreadsheetId=SPREADSHEET_ID).execute()
-                    sheet_names = [s['properties']['title'] for s in sheets_metadata['sheets']]
-                    if edits_sheet not in sheet_names:
-                        requests = [{
-                            'addSheet': {
-                                'properties': {'title': edits_sheet}
-                            }
-                        }]
-                        body = {'requests': requests}
-                        service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body=body).execute()
-                        header = list(changes[0].keys())
-                        service.spreadsheets().values().update(
-                            spreadsheetId=SPREADSHEET_ID,
-                            range=f"{edits_sheet}!A1",
-                            valueInputOption='RAW',
-                            body={'values': [header]}
-                        ).execute()
-                    values = [list(c.values()) for c in changes]
-                    service.spreadsheets().values().append(
-                        spreadsheetId=SPREADSHEET_ID,
-                        range=f"{edits_sheet}!A1",
-                        valueInputOption='RAW',
-                        insertDataOption='INSERT_ROWS',
-                        body={'values': values}
-                    ).execute()
+                    # One request - the writer adds the sheet and its header the first time
+                    changes_df = pd.DataFrame(changes)
+                    get_sheets_writer(SPREADSHEET_ID).append_frame(edits_sheet, changes_df)
                     st.success(f"Saved {len(changes)} changes to Google Sheets ({edits_sheet})")
                 except Exception as e:
                     st.error(f"Failed to save changes: {e}")
@@ -12,6 +12,7 @@ from .pdf_utils import (
     create_section_title_style,
     create_vendor_title_style
 )
+from .formatting import format_quantity_report
 
 def create_combined_report_pdf(veg_data, vendor_data, selected_date):
     """Generate SINGLE PDF containing both vegetable and vendor reports with Telugu support"""
@@ -33,26 +34,14 @@ def create_combined_report_pdf(veg_data, vendor_data, selected_date):
     if veg_data.empty:
         story.append(Paragraph("No vegetable data available for the selected date.", styles['Normal']))
     else:
-        # Create table data - handle Telugu text encoding
+        # Format quantities with their units for display
+        display_data = format_quantity_report(veg_data)
+        
+        # Create table data - Telugu names are already clean strings
         table_data = []
-        headers = veg_data.columns.tolist()
+        headers = display_data.columns.tolist()
         table_data.append(headers)
-        
-        for _, row in veg_data.iterrows():
-            row_data = []
-            for col in headers:
-                cell_value = str(row[col]) if row[col] is not None else ""
-                # Handle Telugu text - ensure proper encoding
-                if col == 'Telugu Name':
-                    try:
-                        if cell_value and cell_value != 'nan':
-                            cell_value = cell_value.encode('utf-8').decode('utf-8')
-                        else:
-                            cell_value = ""
-                    except:
-                        cell_value = ""
-                row_data.append(cell_value)
-            table_data.append(row_data)
+        table_data.extend(display_data.astype(str).values.tolist())
         
         # Create table with adjusted column widths
         available_width = 14.5 * inch  # A4 width minus margins
@@ -102,26 +91,14 @@ def create_combined_report_pdf(veg_data, vendor_data, selected_date):
             vendor_title = Paragraph(f"Vendor: {vendor_name}", vendor_title_style)
             story.append(vendor_title)
             
-            # Create table data - handle Telugu text encoding
+            # Format quantities with their units for display
+            display_data = format_quantity_report(data)
+            
+            # Create table data - Telugu names are already clean strings
             table_data = []
-            headers = data.columns.tolist()
+            headers = display_data.columns.tolist()
             table_data.append(headers)
-            
-            for _, row in data.iterrows():
-                row_data = []
-                for col in headers:
-                    cell_value = str(row[col]) if row[col] is not None else ""
-                    # Handle Telugu text - ensure proper encoding
-                    if col == 'Telugu Name':
-                        try:
-                            if cell_value and cell_value != 'nan':
-                                cell_value = cell_value.encode('utf-8').decode('utf-8')
-                            else:
-                                cell_value = ""
-                        except:
-                            cell_value = ""
-                    row_data.append(cell_value)
-                table_data.append(row_data)
+            table_data.extend(display_data.astype(str).values.tolist())
             
             # Create table with adjusted column widths
             num_cols = len(headers)
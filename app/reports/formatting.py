@@ -0,0 +1,43 @@
+import pandas as pd
+
+# Columns of a quantity report that are labels rather than quantities
+REPORT_LABEL_COLUMNS = ['PIVOT_VEGETABLE_NAME', 'Telugu Name', 'UNITS']
+
+# Quantity columns of a quantity report that hold totals rather than one hotel's quantity
+REPORT_TOTAL_COLUMNS = ['Total Quantity', 'Total']
+
+def format_quantity(qty, units):
+    """Format a quantity with its units exactly as the reports always have - the value is not rounded"""
+    return f"{qty} {units}"
+
+def format_hotel_quantity(qty, units):
+    """Format one hotel's quantity in a report - hotels without the vegetable show 0"""
+    return f"{qty} {units}" if qty > 0 else f"0 {units}"
+
+def format_amount(value):
+    """Format a price or amount with 2 decimals, blank when missing"""
+    return "" if pd.isna(value) else f"{value:.2f}"
+
+def format_quantity_report(report_df):
+    """Render a numeric vegetable/vendor report as display strings - every quantity column gets its units"""
+    if report_df.empty:
+        return report_df
+
+    display_df = report_df.drop(columns='UNITS')
+    units = report_df['UNITS'].tolist()
+    for column in report_df.columns:
+        if column in REPORT_TOTAL_COLUMNS:
+            display_df[column] = [format_quantity(qty, unit) for qty, unit in zip(report_df[column], units)]
+        elif column not in REPORT_LABEL_COLUMNS:
+            display_df[column] = [format_hotel_quantity(qty, unit) for qty, unit in zip(report_df[column], units)]
+    return display_df
+
+def format_kitchen_bill(bill_df):
+    """Render a numeric kitchen bill as display strings - Quantity with units, PRICE and TOTAL with 2 decimals"""
+    return pd.DataFrame({
+        'Vegetable Name': bill_df['Vegetable Name'],
+        'Telugu Name': bill_df['Telugu Name'],
+        'Quantity': [format_quantity(qty, unit) for qty, unit in zip(bill_df['Quantity'], bill_df['UNITS'])],
+        'PRICE': [format_amount(price) for price in bill_df['PRICE']],
+        'TOTAL': [format_amount(total) for total in bill_df['TOTAL']],
+    })
@@ -6,8 +6,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import inch
 import streamlit as st
+from utils.data_processing import compute_daily_totals
 
-def create_hotel_summary_pdf(df, date_range, hotel_name):
+def create_hotel_summary_pdf(df, date_range, hotel_name, daily_totals=None):
     """
     Generate a PDF with a table showing date and total amount for each date in the range
     for a specific hotel, with a grand total at the bottom.
@@ -16,18 +17,33 @@ def create_hotel_summary_pdf(df, date_range, hotel_name):
         df: DataFrame containing the data
         date_range: Tuple of (start_date, end_date) or single date
         hotel_name: Name of the hotel to generate summary for
+        daily_totals: Optional table from compute_daily_totals covering the range, so several
+            hotels can share one computation. With a per-kitchen breakdown, each kitchen gets a column.
         
     Returns:
         BytesIO buffer containing the PDF
     """
-    if df.empty:
+    # Determine date range
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        start_date, end_date = date_range
+    else:
+        start_date = end_date = date_range
+    
+    try:
+        start_datetime = pd.Timestamp(start_date)
+        end_datetime = pd.Timestamp(end_date)
+    except TypeError:
         return None
     
-    # Filter data for the specific hotel
-    hotel_data = df[df['MAIN HOTEL NAME'] == hotel_name]
+    if daily_totals is None:
+        if df.empty:
+            return None
+        daily_totals = compute_daily_totals(df[df['MAIN HOTEL NAME'] == hotel_name], start_datetime, end_datetime)
     
-    if hotel_data.empty:
+    # Only hotels with orders in the range have totals
+    if hotel_name not in daily_totals.columns:
         return None
+    hotel_totals = daily_totals[hotel_name]
     
     # Create PDF buffer
     buffer = io.BytesIO()
@@ -53,56 +69,29 @@ def create_hotel_summary_pdf(df, date_range, hotel_name):
     story.append(title)
     story.append(Spacer(1, 20))
     
-    # Determine date range
-    if isinstance(date_range, tuple) and len(date_range) == 2:
-        start_date, end_date = date_range
+    # A per-kitchen breakdown gives one column per kitchen before the day's total
+    if isinstance(hotel_totals, pd.DataFrame):
+        kitchens = list(hotel_totals.columns)
+        date_totals = hotel_totals.sum(axis=1)
     else:
-        start_date = end_date = date_range
-    
-    # Convert to datetime for filtering
-    try:
-        start_datetime = pd.Timestamp(start_date)
-        end_datetime = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-    except TypeError:
-        return None
-    
-    # Create a list of all dates in the range
-    date_list = pd.date_range(start=start_datetime.date(), end=end_datetime.date())
+        kitchens = []
+        hotel_totals = hotel_totals.to_frame()
+        date_totals = hotel_totals.iloc[:, 0]
     
     # Create table data
-    table_data = [['Date', 'Total Amount']]
-    grand_total = 0
-    
-    # Process each date
-    for date in date_list:
-        # Filter data for this date
-        date_data = hotel_data[hotel_data['DATE'].dt.date == date.date()]
-        
-        # Calculate total amount for this date
-        date_total = 0
-        
-        # Check if PRICE column exists
-        if 'PRICE' in date_data.columns:
-            # Calculate total amount for each vegetable and sum
-            for _, row in date_data.iterrows():
-                try:
-                    price = float(row['PRICE']) if pd.notna(row['PRICE']) else 0
-                    quantity = float(row['QUANTITY']) if pd.notna(row['QUANTITY']) else 0
-                    date_total += price * quantity
-                except (ValueError, TypeError):
-                    pass
-        
-        # Add to grand total
-        grand_total += date_total
-        
-        # Add row to table
-        table_data.append([date.strftime('%Y-%m-%d'), f"{date_total:.2f}"])
+    table_data = [['Date'] + [str(kitchen) for kitchen in kitchens] + ['Total Amount']]
+    for date, kitchen_totals, date_total in zip(hotel_totals.index, hotel_totals.to_numpy(), date_totals):
+        kitchen_cells = [f"{total:.2f}" for total in kitchen_totals] if kitchens else []
+        table_data.append([date.strftime('%Y-%m-%d')] + kitchen_cells + [f"{date_total:.2f}"])
     
     # Add grand total row
-    table_data.append(['Grand Total', f"{grand_total:.2f}"])
+    grand_total = date_totals.sum()
+    kitchen_grand_totals = [f"{total:.2f}" for total in hotel_totals.sum()] if kitchens else []
+    table_data.append(['Grand Total'] + kitchen_grand_totals + [f"{grand_total:.2f}"])
     
-    # Create table
-    col_widths = [2.5*inch, 2.5*inch]
+    # Create table - two columns keep their original width, kitchen breakdowns share the page width
+    n_columns = len(table_data[0])
+    col_widths = [2.5*inch, 2.5*inch] if n_columns == 2 else [7*inch / n_columns] * n_columns
     table = Table(table_data, colWidths=col_widths)
     
     # Style the table
@@ -6,6 +6,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.units import inch
 import streamlit as st
+from utils.data_processing import build_order_cube, order_hotels, summarize_vegetables
+from .formatting import format_quantity
 
 # Register Telugu font if needed
 try:
@@ -24,19 +26,12 @@ def create_individual_hotel_reports_pdf(df, selected_date):
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
     story = []
     
-    # Define the desired hotel order
-    desired_hotel_order = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', ' BHEEMILI']
+    # Get unique hotels from the order cube in desired order
+    cube = build_order_cube(df)
+    hotels = order_hotels(cube['MAIN HOTEL NAME'].unique())
     
-    # Get unique hotels from data in desired order
-    available_hotels = df['MAIN HOTEL NAME'].unique()
-    hotels = []
-    for hotel in desired_hotel_order:
-        if hotel in available_hotels:
-            hotels.append(hotel)
-    
-    # Add any remaining hotels not in the desired order (sorted alphabetically)
-    remaining_hotels = sorted([h for h in available_hotels if h not in desired_hotel_order])
-    hotels.extend(remaining_hotels)
+    # Vegetable totals for every hotel, sliced per hotel below
+    hotel_summaries = dict(tuple(summarize_vegetables(cube, by=['MAIN HOTEL NAME']).groupby('MAIN HOTEL NAME', sort=False, observed=True)))
     
     # Get styles
     styles = getSampleStyleSheet()
@@ -83,43 +78,24 @@ def create_individual_hotel_reports_pdf(df, selected_date):
         combined_title = Paragraph(f"Hotel: {hotel}  -  Date: {selected_date.strftime('%Y-%m-%d')}", hotel_title_style)
         story.append(combined_title)
         
-        # Filter data for this hotel
-        hotel_data = df[df['MAIN HOTEL NAME'] == hotel]
+        # Slice this hotel's vegetables from the cube
+        hotel_data = hotel_summaries.get(hotel)
         
-        if hotel_data.empty:
+        if hotel_data is None or hotel_data.empty:
             story.append(Paragraph("No orders found for this hotel on the selected date.", no_data_style))
         else:
-            # Group by vegetable and sum quantities (handling multiple units)
-            hotel_report_data = []
-            
-            # Get unique combinations of PIVOT_VEGETABLE_NAME and units for this hotel
-            veg_unit_combinations = hotel_data[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
-            
-            for _, row in veg_unit_combinations.iterrows():
-                veg_name = row['PIVOT_VEGETABLE_NAME']
-                units = row['UNITS']
-                telugu_name = row['TELUGU NAME']
-                
-                # Filter data for this specific vegetable-unit combination
-                veg_data = hotel_data[(hotel_data['PIVOT_VEGETABLE_NAME'] == veg_name) & (hotel_data['UNITS'] == units)]
-                total_qty = veg_data['QUANTITY'].sum()
-                
-                if total_qty > 0:  # Only include items with quantity > 0
-                    # Create display name that includes units if there are multiple unit types for same vegetable
-                    veg_units_count = hotel_data[hotel_data['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-                    if veg_units_count > 1:
-                        display_name = f"{veg_name} ({units})"
-                    else:
-                        display_name = veg_name
-                    
-                    hotel_report_data.append([
-                        display_name,
-                        telugu_name if telugu_name and str(telugu_name) != 'nan' else '',
-                        f"{total_qty} {units}"
-                    ])
-            
-            # Sort alphabetically by vegetable name
-            hotel_report_data.sort(key=lambda x: x[0])
+            # Only include items with quantity > 0, sorted alphabetically by vegetable name
+            hotel_items = hotel_data[hotel_data['QUANTITY'] > 0].sort_values('DISPLAY_NAME', kind='mergesort')
+            hotel_report_data = [
+                [
+                    display_name,
+                    telugu_name,
+                    format_quantity(total_qty, units)
+                ]
+                for display_name, telugu_name, total_qty, units in zip(
+                    hotel_items['DISPLAY_NAME'], hotel_items['TELUGU NAME'], hotel_items['QUANTITY'], hotel_items['UNITS']
+                )
+            ]
             
             if hotel_report_data:
                 # Create table
@@ -187,35 +163,20 @@ def create_individual_hotel_reports_pdf(df, selected_date):
     combined_price_title = Paragraph(f"Vegetable Prices  -  Date: {selected_date.strftime('%Y-%m-%d')}", price_title_style)
     story.append(combined_price_title)
     
-    # Get all vegetables from the data
-    all_veg_data = []
-    veg_unit_combinations = df[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
-    
-    for _, row in veg_unit_combinations.iterrows():
-        veg_name = row['PIVOT_VEGETABLE_NAME']
-        units = row['UNITS']
-        telugu_name = row['TELUGU NAME']
-        
-        # Create display name that includes units if there are multiple unit types for same vegetable
-        veg_units_count = df[df['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-        if veg_units_count > 1:
-            display_name = f"{veg_name} ({units})"
-        else:
-            display_name = veg_name
-        
-        # Calculate total quantity for this vegetable-unit combination across all hotels
-        total_qty = df[(df['PIVOT_VEGETABLE_NAME'] == veg_name) & (df['UNITS'] == units)]['QUANTITY'].sum()
-        
-        all_veg_data.append([
+    # Get all vegetables with their total quantity across all hotels, sorted alphabetically
+    all_vegetables = summarize_vegetables(cube).sort_values('DISPLAY_NAME', kind='mergesort')
+    all_veg_data = [
+        [
             display_name,
-            telugu_name if telugu_name and str(telugu_name) != 'nan' else '',
+            telugu_name,
             units,
             f"{total_qty:.2f}",  # Total quantity column
             ""  # Empty actual price column for manual entry
-        ])
-    
-    # Sort alphabetically by vegetable name
-    all_veg_data.sort(key=lambda x: x[0])
+        ]
+        for display_name, telugu_name, units, total_qty in zip(
+            all_vegetables['DISPLAY_NAME'], all_vegetables['TELUGU NAME'], all_vegetables['UNITS'], all_vegetables['QUANTITY']
+        )
+    ]
     
     if all_veg_data:
         # Create table
@@ -1,168 +1,339 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from .schema import DATE_FORMAT, to_float
+from .validation import build_issues_table
+
+def build_date_index(df):
+    """Parse the DATE column once and map each day to the positions of its rows"""
+    dates = pd.to_datetime(df['DATE'], format=DATE_FORMAT, errors='coerce')
+    row_positions = pd.Series(np.arange(len(df))).groupby(dates.dt.normalize().to_numpy()).indices
+    return {
+        'n_rows': len(df),
+        'dates': dates.reset_index(drop=True),
+        'positions': {pd.Timestamp(day).date(): positions for day, positions in row_positions.items()}
+    }
+
+@st.cache_resource(max_entries=4)
+def _get_snapshot_date_index(snapshot_id, n_rows, _df):
+    """Date index for one sheet snapshot - cached so each snapshot is parsed once"""
+    return build_date_index(_df)
+
+def get_date_index(df):
+    """Get the date index for df, reusing the cached one when df is a whole sheet snapshot"""
+    snapshot_id = df.attrs.get('snapshot_id')
+    # Filtered or reordered frames inherit attrs but not the snapshot's row positions
+    if snapshot_id is not None and df.index.equals(pd.RangeIndex(len(df))):
+        return _get_snapshot_date_index(snapshot_id, len(df), df)
+    return build_date_index(df)
+
+@st.cache_resource(max_entries=4)
+def _get_snapshot_issues(snapshot_id, n_rows, _df):
+    """Issues table for one sheet snapshot - cached so each snapshot is expanded once"""
+    return build_issues_table(_df)
+
+def get_issues_table(df):
+    """Get the data-quality issues for df, reusing the cached table when df is a whole sheet snapshot"""
+    snapshot_id = df.attrs.get('snapshot_id')
+    if snapshot_id is not None and df.index.equals(pd.RangeIndex(len(df))):
+        return _get_snapshot_issues(snapshot_id, len(df), df)
+    return build_issues_table(df)
+
+def get_day_issues(df, selected_date):
+    """Data-quality issues for one day's rows - only those rows are expanded, looked up in the date index"""
+    positions = get_date_index(df)['positions'].get(pd.Timestamp(selected_date).date(), np.array([], dtype=np.intp))
+    # take keeps the snapshot's index labels, so the sheet row numbers stay correct
+    return build_issues_table(df.take(positions))
+
+def _select_order_rows(df, date_index, positions):
+    """Build a fresh frame of the rows at positions that have a positive quantity.
+    
+    Only the selected rows are copied - the input frame (usually the cached snapshot) is never
+    written to. DATE is the parsed date and QUANTITY is float64 with missing values as 0.
+    """
+    # Decide which rows to keep from the QUANTITY values alone, then copy those rows once
+    quantities = to_float(df['QUANTITY'].take(positions)).fillna(0).to_numpy()
+    keep = quantities > 0  # Remove zero quantities
+    positions = positions[keep]
+    
+    filtered_df = df.take(positions)
+    filtered_df['DATE'] = date_index['dates'].to_numpy()[positions]
+    filtered_df['QUANTITY'] = quantities[keep]
+    return filtered_df
 
 def process_data_for_date(df, selected_date):
-    """Filter and process data for selected date"""
+    """Filter and process data for selected date - returns a fresh frame of the day's rows, df is left untouched"""
     if df.empty:
         return pd.DataFrame(), pd.DataFrame()
     
-    # Convert DATE column to datetime if needed
     try:
-        df['DATE'] = pd.to_datetime(df['DATE'], format='%d/%m/%Y', errors='coerce')
         selected_date = pd.to_datetime(selected_date)
         
-        # Filter by date
-        filtered_df = df[df['DATE'].dt.date == selected_date.date()]
+        # Look up the day's rows in the date index instead of scanning every date
+        date_index = get_date_index(df)
+        positions = date_index['positions'].get(selected_date.date(), np.array([], dtype=np.intp))
         
-        if filtered_df.empty:
+        if len(positions) == 0:
             st.warning(f"No data found for date: {selected_date.strftime('%Y-%m-%d')}")
             return pd.DataFrame(), pd.DataFrame()
         
-        # Clean and prepare data
-        filtered_df.loc[:, 'QUANTITY'] = pd.to_numeric(filtered_df['QUANTITY'], errors='coerce').fillna(0)
-        filtered_df = filtered_df[filtered_df['QUANTITY'] > 0]  # Remove zero quantities
+        filtered_df = _select_order_rows(df, date_index, positions)
         
         return filtered_df, filtered_df
     except Exception as e:
         st.error(f"Error processing data: {str(e)}")
         return pd.DataFrame(), pd.DataFrame()
 
-def create_vegetable_report_data(df):
-    """Create data structure for Report 1: Vegetable-wise summary - SORTED ALPHABETICALLY"""
+def process_data_for_range(df, start_date, end_date):
+    """Filter data for every day from start_date to end_date in one pass over the date index.
+    
+    Rows keep their sheet order, DATE is the parsed date and zero quantities are removed,
+    as in process_data_for_date.
+    """
     if df.empty:
         return pd.DataFrame()
     
+    try:
+        days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+        date_index = get_date_index(df)
+        day_positions = [date_index['positions'][day.date()] for day in days if day.date() in date_index['positions']]
+        
+        if not day_positions:
+            st.warning(f"No data found between {pd.Timestamp(start_date).strftime('%Y-%m-%d')} and {pd.Timestamp(end_date).strftime('%Y-%m-%d')}")
+            return pd.DataFrame()
+        
+        return _select_order_rows(df, date_index, np.sort(np.concatenate(day_positions)))
+    except Exception as e:
+        st.error(f"Error processing data: {str(e)}")
+        return pd.DataFrame()
+
+def compute_daily_totals(df, start_date, end_date, by_kitchen=False):
+    """Total amount (PRICE * QUANTITY) per day for every hotel, in one groupby over the range.
+    
+    Returns a frame indexed by every day from start_date to end_date, with one float column per
+    hotel - or per (hotel, kitchen) when by_kitchen - and 0 for days without priced orders.
+    Only hotels with rows in the range get a column.
+    """
+    days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), name='DATE')
+    keys = ['MAIN HOTEL NAME'] + (['KITCHEN NAME'] if by_kitchen else [])
+    if df.empty:
+        return pd.DataFrame(index=days)
+    
+    day = pd.to_datetime(df['DATE'], format=DATE_FORMAT, errors='coerce').dt.normalize()
+    if 'PRICE' in df.columns:
+        amount = to_float(df['PRICE']) * to_float(df['QUANTITY'])
+    else:
+        amount = pd.Series(0.0, index=df.index)
+    in_range = day.between(days[0], days[-1]) if len(days) else pd.Series(False, index=df.index)
+    
+    rows = df.loc[in_range, keys].assign(DATE=day[in_range], AMOUNT=amount[in_range])
+    if rows.empty:
+        return pd.DataFrame(index=days)
+    
+    # Missing amounts are skipped by the sum, so a day with no priced orders totals 0
+    return (
+        rows.groupby(['DATE'] + keys, observed=True)['AMOUNT']
+        .sum()
+        .unstack(keys, fill_value=0.0)
+        .reindex(days, fill_value=0.0)
+    )
+
+def order_hotels(available_hotels):
+    """Order hotels for report columns - the desired order first, then any others alphabetically"""
     # Define the desired hotel order
     desired_hotel_order = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', ' BHEEMILI']
     
-    available_hotels = df['MAIN HOTEL NAME'].unique()
-
-    # Create ordered list of hotels - first the desired order, then any others alphabetically
-    hotels = []
-    for hotel in desired_hotel_order:
-        if hotel in available_hotels:
-            hotels.append(hotel)
+    hotels = [hotel for hotel in desired_hotel_order if hotel in available_hotels]
     
     # Add any remaining hotels not in the desired order (sorted alphabetically)
-    remaining_hotels = sorted([h for h in available_hotels if h not in desired_hotel_order])
-    hotels.extend(remaining_hotels)
+    hotels.extend(sorted([h for h in available_hotels if h not in desired_hotel_order]))
+    return hotels
+
+def _key_index(arrays):
+    """Build a lookup index from one or more key arrays"""
+    return pd.MultiIndex.from_arrays(arrays) if len(arrays) > 1 else pd.Index(arrays[0])
+
+def _display_names(frame, by=()):
+    """Vegetable names, with units added when a vegetable has multiple unit types within its `by` group"""
+    veg_units_count = frame.groupby(list(by) + ['PIVOT_VEGETABLE_NAME'], observed=True)['UNITS'].transform('nunique')
+    return [
+        f"{veg_name} ({units})" if count > 1 else veg_name
+        for veg_name, units, count in zip(frame['PIVOT_VEGETABLE_NAME'], frame['UNITS'], veg_units_count)
+    ]
 
+# Grain of the order cube - Telugu name is part of the key so first-seen combinations survive
+ORDER_CUBE_KEYS = ['MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']
+# Columns build_order_cube reads - load only these for pages that work from the cube
+ORDER_CUBE_COLUMNS = ORDER_CUBE_KEYS + ['QUANTITY', 'PRICE']
+
+def _normalize_order_rows(df):
+    """Rows with every ORDER_CUBE_KEYS column present and float64 QUANTITY and PRICE"""
+    columns = {}
+    if 'KITCHEN NAME' not in df.columns:
+        # If KITCHEN NAME column doesn't exist, use MAIN HOTEL NAME as kitchen
+        columns['KITCHEN NAME'] = df['MAIN HOTEL NAME']
+    for column in ['VENDOR', 'TELUGU NAME']:
+        if column not in df.columns:
+            columns[column] = ''
+    # Quantities and prices are carried as float64 - already typed for sheet snapshots
+    columns['QUANTITY'] = to_float(df['QUANTITY'])
+    if 'PRICE' in df.columns:
+        columns['PRICE'] = to_float(df['PRICE'])
+    else:
+        columns['PRICE'] = float('nan')
+    return df.assign(**columns)
+
+def _aggregate_orders(df, by=()):
+    """Aggregate rows into order cube rows per (by..., ORDER_CUBE_KEYS) in first-seen order"""
+    rows = _normalize_order_rows(df)
     
-    # Group by PIVOT_VEGETABLE_NAME AND units combination to handle different units properly
-    report_data = []
+    cube = (
+        rows.groupby(list(by) + ORDER_CUBE_KEYS, sort=False, dropna=False, observed=True)
+        .agg(QUANTITY=('QUANTITY', 'sum'), PRICE=('PRICE', 'first'))
+        .reset_index()
+    )
+    cube['DISPLAY_NAME'] = _display_names(cube, by)
+    return cube
+
+def build_order_cube(df):
+    """Aggregate a day's rows once into the order cube shared by every report builder.
     
-    # Get unique combinations of PIVOT_VEGETABLE_NAME and units
-    veg_unit_combinations = df[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
+    The cube has one row per (hotel, kitchen, vendor, vegetable, unit, Telugu name) in first-seen
+    order, with summed float QUANTITY, first-seen numeric PRICE and the day-wide DISPLAY_NAME.
+    Builders slice the cube instead of rescanning rows; passing a cube back in returns it unchanged.
+    """
+    if df.attrs.get('order_cube'):
+        return df
     
-    for _, row in veg_unit_combinations.iterrows():
-        veg_name = row['PIVOT_VEGETABLE_NAME']
-        units = row['UNITS']
-        telugu_name = row['TELUGU NAME']
-        
-        # Filter data for this specific vegetable-unit combination
-        veg_data = df[(df['PIVOT_VEGETABLE_NAME'] == veg_name) & (df['UNITS'] == units)]
-        
-        # Create display name that includes units if there are multiple unit types for same vegetable
-        veg_units_count = df[df['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-        if veg_units_count > 1:
-            display_name = f"{veg_name} ({units})"
-        else:
-            display_name = veg_name
-        
-        report_row = {
-            'PIVOT_VEGETABLE_NAME': display_name,
-            'Telugu Name': telugu_name,
-        }
-        
-        total_qty = 0
-        
-        # Add quantity for each hotel
-        for hotel in hotels:
-            hotel_data = veg_data[veg_data['MAIN HOTEL NAME'] == hotel]
-            qty = hotel_data['QUANTITY'].sum() if not hotel_data.empty else 0
-            report_row[f"{hotel}"] = f"{qty} {units}" if qty > 0 else f"0 {units}"
-            total_qty += qty
-        
-        report_row['Total Quantity'] = f"{total_qty} {units}"
-        report_data.append(report_row)
+    cube = _aggregate_orders(df)
+    cube.attrs['order_cube'] = True
+    return cube
+
+def build_daily_order_cubes(df):
+    """Aggregate a date range's rows once into an order cube per day, keyed by date in date order.
+    
+    DATE is part of the grouping, so each day's cube matches build_order_cube on that day's rows alone.
+    """
+    if df.empty:
+        return {}
+    
+    cube = _aggregate_orders(df.assign(DATE=df['DATE'].dt.normalize()), by=['DATE'])
+    daily_cubes = {}
+    for day, day_cube in cube.groupby('DATE', sort=True):
+        day_cube = day_cube.drop(columns='DATE').reset_index(drop=True)
+        day_cube.attrs['order_cube'] = True
+        daily_cubes[day.date()] = day_cube
+    return daily_cubes
+
+def summarize_vegetables(df, by=()):
+    """Slice the order cube into one row per (by..., vegetable, unit, Telugu name) in first-seen order.
+    
+    QUANTITY is summed and PRICE is the first-seen price per (by..., vegetable, unit), and
+    DISPLAY_NAME is decided within each `by` group.
+    """
+    cube = build_order_cube(df)
+    keys = list(by) + ['PIVOT_VEGETABLE_NAME', 'UNITS']
+    
+    totals = cube.groupby(keys, sort=False, observed=True).agg(QUANTITY=('QUANTITY', 'sum'), PRICE=('PRICE', 'first'))
+    summary = cube[keys + ['TELUGU NAME']].drop_duplicates().join(totals, on=keys).reset_index(drop=True)
+    summary['QUANTITY'] = summary['QUANTITY'].fillna(0)
+    summary['DISPLAY_NAME'] = _display_names(summary, by)
+    return summary
+
+def _sequential_sums(df, keys):
+    """QUANTITY summed per group of keys (first-seen order), adding each group's rows left to right in row order.
+    
+    This is how the per-cell loop the reports used to run summed (Series.sum over object-dtype rows), so
+    totals match it to the last digit - a grouped float sum (pairwise or compensated) can differ in it.
+    """
+    groups = df.groupby(keys, observed=True, sort=False)
+    codes = groups.ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    sums = np.add.reduceat(df['QUANTITY'].to_numpy(dtype=object)[order], starts) if len(order) else []
+    return pd.Series(np.asarray(sums, dtype='float64'), index=groups.size().index)
+
+def _build_quantity_report(df, hotels, total_column, by=()):
+    """Pivot quantities into one row per (by..., vegetable, unit, Telugu name) with a float column per hotel.
+    
+    df is the day's order rows. Rows keep their first-seen order. Display names are decided within each
+    `by` group, so each group matches a report built from that group's rows alone.
+    """
+    by = list(by)
+    keys = by + ['PIVOT_VEGETABLE_NAME', 'UNITS']
+    
+    # Unique combinations of the keys and Telugu name, in first-seen order
+    veg_unit_combinations = df[keys + ['TELUGU NAME']].drop_duplicates()
+    key_arrays = [veg_unit_combinations[key].to_numpy() for key in keys]
+    units = key_arrays[-1]
+    
+    # One grouped pass gives the quantity for every (by..., vegetable, unit, hotel) cell
+    hotel_quantities = (
+        _sequential_sums(df, keys + ['MAIN HOTEL NAME'])
+        .unstack('MAIN HOTEL NAME', fill_value=0)
+        .reindex(index=_key_index(key_arrays), columns=hotels, fill_value=0)
+    )
+    
+    report_data = {key: array for key, array in zip(by, key_arrays)}
+    report_data['PIVOT_VEGETABLE_NAME'] = _display_names(veg_unit_combinations, by)
+    report_data['Telugu Name'] = veg_unit_combinations['TELUGU NAME'].tolist()
+    report_data['UNITS'] = units
+    
+    # Add quantity for each hotel, accumulating totals in hotel order
+    total_quantities = 0.0
+    for hotel in hotels:
+        quantities = hotel_quantities[hotel].to_numpy(dtype='float64')
+        report_data[f"{hotel}"] = quantities
+        total_quantities = total_quantities + quantities
+    
+    report_data[total_column] = total_quantities
     
-    # Convert to DataFrame and sort alphabetically by PIVOT_VEGETABLE_NAME
-    result_df = pd.DataFrame(report_data)
+    return pd.DataFrame(report_data)
+
+def create_vegetable_report_data(df):
+    """Create data structure for Report 1: Vegetable-wise summary - SORTED ALPHABETICALLY
+    
+    Hotel and total quantities are float64 columns next to a UNITS column; renderers format them.
+    Pass the day's rows rather than the order cube - its pre-summed quantities can differ in the last digit.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    
+    rows = _normalize_order_rows(df)
+    hotels = order_hotels(rows['MAIN HOTEL NAME'].unique())
+    result_df = _build_quantity_report(rows, hotels, 'Total Quantity')
+    
+    # Sort alphabetically by PIVOT_VEGETABLE_NAME
     if not result_df.empty:
         result_df = result_df.sort_values('PIVOT_VEGETABLE_NAME', ascending=True).reset_index(drop=True)
     
     return result_df
 
 def create_vendor_report_data(df):
-    """Create data structure for Report 2: Vendor-wise summary with Telugu names - SORTED ALPHABETICALLY"""
+    """Create data structure for Report 2: Vendor-wise summary with Telugu names - SORTED ALPHABETICALLY
+    
+    Each vendor's frame has float64 quantity columns next to a UNITS column, like Report 1.
+    Pass the day's rows, as for create_vegetable_report_data.
+    """
     if df.empty:
         return {}
     
-    # Define the desired hotel order
-    desired_hotel_order = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', ' BHEEMILI']
-    
-    # Get unique hotels from data
-    available_hotels = df['MAIN HOTEL NAME'].unique()
+    rows = _normalize_order_rows(df)
+    hotels = order_hotels(rows['MAIN HOTEL NAME'].unique())
+    vendors = sorted(rows['VENDOR'].dropna().unique())  # Sort vendors alphabetically too
     
-    # Create ordered list of hotels - first the desired order, then any others alphabetically
-    hotels = []
-    for hotel in desired_hotel_order:
-        if hotel in available_hotels:
-            hotels.append(hotel)
-    
-    # Add any remaining hotels not in the desired order (sorted alphabetically)
-    remaining_hotels = sorted([h for h in available_hotels if h not in desired_hotel_order])
-    hotels.extend(remaining_hotels)
+    # One pivot over (VENDOR, vegetable, unit, hotel), split into a report per vendor
+    report_df = _build_quantity_report(rows, hotels, 'Total', by=['VENDOR'])
+    reports_by_vendor = dict(tuple(report_df.groupby('VENDOR', sort=False, observed=True)))
     
-    vendors = sorted(df['VENDOR'].dropna().unique())  # Sort vendors alphabetically too
-
     vendor_reports = {}
     
     for vendor in vendors:
         if pd.isna(vendor) or vendor == '':
             continue
-            
-        vendor_data = df[df['VENDOR'] == vendor]
-        vendor_report = []
-        
-        # Get unique combinations of PIVOT_VEGETABLE_NAME and units for this vendor
-        veg_unit_combinations = vendor_data[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates()
-        
-        for _, row in veg_unit_combinations.iterrows():
-            veg_name = row['PIVOT_VEGETABLE_NAME']
-            units = row['UNITS']
-            telugu_name = row['TELUGU NAME']
-            
-            # Filter data for this specific vegetable-unit combination
-            veg_data = vendor_data[(vendor_data['PIVOT_VEGETABLE_NAME'] == veg_name) & (vendor_data['UNITS'] == units)]
-            
-            # Create display name that includes units if there are multiple unit types for same vegetable
-            veg_units_count = vendor_data[vendor_data['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique()
-            if veg_units_count > 1:
-                display_name = f"{veg_name} ({units})"
-            else:
-                display_name = veg_name
-            
-            report_row = {
-                'PIVOT_VEGETABLE_NAME': display_name,
-                'Telugu Name': telugu_name
-            }
-            total_qty = 0
-            
-            for hotel in hotels:
-                hotel_data = veg_data[veg_data['MAIN HOTEL NAME'] == hotel]
-                qty = hotel_data['QUANTITY'].sum() if not hotel_data.empty else 0
-                report_row[hotel] = f"{qty} {units}" if qty > 0 else f"0 {units}"
-                total_qty += qty
-            
-            report_row['Total'] = f"{total_qty} {units}"
-            vendor_report.append(report_row)
-        
-        # Convert to DataFrame and sort alphabetically by PIVOT_VEGETABLE_NAME
-        vendor_df = pd.DataFrame(vendor_report)
-        if not vendor_df.empty:
-            vendor_df = vendor_df.sort_values('PIVOT_VEGETABLE_NAME', ascending=True).reset_index(drop=True)
         
-        vendor_reports[vendor] = vendor_df
+        # Sort alphabetically by PIVOT_VEGETABLE_NAME
+        vendor_df = reports_by_vendor[vendor].drop(columns='VENDOR')
+        vendor_reports[vendor] = vendor_df.sort_values('PIVOT_VEGETABLE_NAME', ascending=True).reset_index(drop=True)
     
     return vendor_reports
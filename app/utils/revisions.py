@@ -0,0 +1,7 @@
+# Cached functions take the revision of the data they read as an argument, so new data gets a new
+# cache entry. Revisions must be visible to every server process - MongoDB price revisions are read
+# from the prices themselves (see database.mongodb.get_prices_revision).
+
+def get_sheet_revision(df):
+    """Revision of a sheet snapshot - changes only when a sync brings in different data"""
+    return df.attrs.get('snapshot_id')
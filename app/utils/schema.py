@@ -0,0 +1,86 @@
+import pandas as pd
+from .validation import flag_row_issues
+
+# Date format used in the LIST_CREATION sheet
+DATE_FORMAT = '%d/%m/%Y'
+
+# Dimension columns that repeat across rows - stored as categoricals so masks and groupbys run on integer codes
+DIMENSION_COLUMNS = ['MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']
+
+# Numeric columns - stored as float64, blank or non-numeric cells become NaN
+NUMERIC_COLUMNS = ['QUANTITY', 'PRICE']
+
+# Columns added by the schema rather than read from the sheet
+DERIVED_COLUMNS = ['ROW_VALID', 'ROW_ISSUES']
+
+def to_float(values):
+    """Coerce values to float64 - blanks and non-numeric values become NaN, typed columns pass through"""
+    if values.dtype == 'float64':
+        return values
+    return pd.to_numeric(values, errors='coerce').astype('float64')
+
+def compact_dimensions(df):
+    """Convert dimension columns to categoricals, in place.
+    
+    Category sets are the sorted unique values, so they are the same for the same data and
+    sorting a column by its categories matches sorting the strings. Group by these columns
+    with observed=True to skip unused category combinations.
+    """
+    for column in DIMENSION_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+def fill_missing_dimensions(df):
+    """Store missing dimension values (and 'nan' Telugu names) as '', in place - renderers rely on it"""
+    for column in DIMENSION_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].fillna('')
+    if 'TELUGU NAME' in df.columns and not isinstance(df['TELUGU NAME'].dtype, pd.CategoricalDtype):
+        # Telugu names pasted from exports can hold the text 'nan' - treat it as missing
+        df['TELUGU NAME'] = df['TELUGU NAME'].replace('nan', '')
+    return df
+
+def _blank_cells(values):
+    """Mask of missing or whitespace-only cells"""
+    if values.dtype != object:
+        return values.isna()
+    return values.isna() | values.astype(str).str.strip().eq('')
+
+def apply_order_schema(df):
+    """Coerce sheet data to the typed order schema, in place.
+    
+    - DATE: datetime64, unparseable dates become NaT
+    - QUANTITY, PRICE: float64, blank or non-numeric cells become NaN
+    - dimension columns: missing cells (and 'nan' Telugu names) become '' and values are stored as categoricals
+    - ROW_VALID: True when the row has both a DATE and a QUANTITY
+    - ROW_ISSUES: data-quality bit flags from utils.validation (0 for a clean row)
+    
+    Rows are never dropped, so row positions still match the sheet.
+    """
+    blank, unparsed = {}, {}
+    for column in ['DATE'] + NUMERIC_COLUMNS:
+        if column in df.columns:
+            blank[column] = _blank_cells(df[column])
+    
+    if 'DATE' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['DATE']):
+        df['DATE'] = pd.to_datetime(df['DATE'], format=DATE_FORMAT, errors='coerce')
+    
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = to_float(df[column])
+    
+    # Cells that had a value but did not parse
+    for column in blank:
+        unparsed[column] = df[column].isna() & ~blank[column]
+    
+    fill_missing_dimensions(df)
+    compact_dimensions(df)
+    
+    valid = pd.Series(True, index=df.index)
+    for column in ['DATE', 'QUANTITY']:
+        if column in df.columns:
+            valid &= df[column].notna()
+    df['ROW_VALID'] = valid
+    df['ROW_ISSUES'] = flag_row_issues(df, blank, unparsed)
+    return df
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from pandas.api.types import union_categoricals
+from .schema import apply_order_schema
+
+def values_to_frame(headers, rows):
+    """Build a DataFrame from sheet rows - short rows are padded with '' and long rows truncated to the header"""
+    frame = pd.DataFrame(rows).reindex(columns=range(len(headers))) if rows else pd.DataFrame(columns=range(len(headers)))
+    frame = frame.fillna('').astype(object)
+    frame.columns = headers
+    return frame
+
+def concat_snapshots(*frames):
+    """Concatenate typed frames in order, keeping categoricals (with sorted categories) categorical"""
+    columns = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+def _fingerprint(rows):
+    """Stable hash of raw sheet rows"""
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class SheetSync:
+    """Incrementally sync an append-only sheet into a typed DataFrame.
+
+    The first sync reads the whole range in blocks of `chunk_rows` rows, `parallel_reads` at a
+    time, typing each block as it arrives so only one wave of raw rows is held at once. An empty
+    block at the end of a wave marks the end of the data (so blank gaps must stay shorter than
+    `chunk_rows`). Later syncs read the header plus the last `tail_size`
+    known rows and everything after them in one batchGet: if the header and the tail's fingerprint
+    are unchanged only the new rows are parsed and appended, otherwise (rows edited, inserted or
+    deleted near the end) the whole range is read again. Edits further up are picked up by a full
+    sync every `full_sync_interval` seconds, or right away by sync(force_full=True).
+
+    `values_api` is the Sheets values resource (service.spreadsheets().values()) or any object with
+    the same get/batchGet methods, or a function returning one; it only builds requests, from several
+    threads during a full sync. `execute` runs a request and returns its response - it must be safe to
+    call from several threads at once (e.g. sending on pooled transports).
+    """
+
+    def __init__(self, values_api, spreadsheet_id, sheet_name, last_column='L', tail_size=20,
+                 full_sync_interval=3600, execute=None, chunk_rows=20000, parallel_reads=4):
+        self.values_api = values_api
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.last_column = last_column
+        self.tail_size = tail_size
+        self.full_sync_interval = full_sync_interval
+        self.execute = execute or (lambda request: request.execute())
+        self.chunk_rows = chunk_rows
+        self.parallel_reads = parallel_reads
+
+        self.last_sync = {}
+        self._lock = threading.Lock()
+        self._frame = None
+        self._headers = None
+        self._row_count = 0
+        self._tail = []
+        self._full_synced_at = 0.0
+        self._synced_at = None
+
+    def sync(self, force_full=False):
+        """Bring the snapshot up to date and return it - an empty DataFrame when the sheet has no data.
+
+        force_full reads the whole sheet even when the tail is unchanged, so edits anywhere in it
+        are picked up (an explicit refresh); otherwise only the tail and newer rows are read.
+        """
+        with self._lock:
+            if (force_full or self._frame is None
+                    or time.time() - self._full_synced_at > self.full_sync_interval):
+                return self._full_sync()
+            return self._incremental_sync()
+
+    @property
+    def synced_at(self):
+        """Time of the last successful sync (or of the restored snapshot's), None before the first"""
+        return self._synced_at
+
+    def get_state(self):
+        """Sync state needed to resume incrementally from a saved snapshot (JSON-serializable)"""
+        with self._lock:
+            return {
+                'headers': self._headers,
+                'row_count': self._row_count,
+                'tail': self._tail,
+                'full_synced_at': self._full_synced_at,
+                'synced_at': self._synced_at,
+                'snapshot_id': self._frame.attrs.get('snapshot_id') if self._frame is not None else None,
+            }
+
+    def restore(self, frame, state):
+        """Resume from a saved snapshot - the next sync only checks the saved tail and reads newer rows"""
+        with self._lock:
+            if len(frame) != state['row_count']:
+                return False
+            frame.attrs['snapshot_id'] = state['snapshot_id']
+            self._frame = frame
+            self._headers = state['headers']
+            self._row_count = state['row_count']
+            self._tail = state['tail']
+            self._full_synced_at = state['full_synced_at']
+            self._synced_at = state.get('synced_at')
+            self.last_sync = {'mode': 'restored', 'rows_fetched': 0}
+            return True
+
+    def _values(self):
+        return self.values_api() if callable(self.values_api) else self.values_api
+
+    def _read_block(self, block):
+        """Raw rows of sheet rows block * chunk_rows + 1 to (block + 1) * chunk_rows"""
+        first_row = block * self.chunk_rows + 1
+        result = self.execute(self._values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}!A{first_row}:{self.last_column}{first_row + self.chunk_rows - 1}"
+        ))
+        return result.get('values', [])
+
+    def _full_sync(self):
+        headers = None
+        frames = []
+        recent_rows = []     # Raw rows kept for the tail fingerprint
+        blank_rows = 0       # Blank rows seen since the last non-empty block
+        rows_fetched = 0
+        next_block = 0
+        finished = False
+
+        with ThreadPoolExecutor(max_workers=self.parallel_reads) as pool:
+            while not finished:
+                wave = range(next_block, next_block + self.parallel_reads)
+                next_block += self.parallel_reads
+                for block, rows in zip(wave, pool.map(self._read_block, wave)):
+                    if block == 0:
+                        if not rows:
+                            finished = True
+                            break
+                        headers, rows = rows[0], rows[1:]
+                    expected = self.chunk_rows - 1 if block == 0 else self.chunk_rows
+                    if not rows:
+                        # Empty block - the end of the data, unless a later block in this wave has rows
+                        finished = True
+                        blank_rows += expected
+                        continue
+                    finished = False
+                    block_rows = len(rows)
+                    if blank_rows:
+                        # Blank rows between blocks keep their place, as in a single read
+                        rows = [[]] * blank_rows + rows
+                    frames.append(apply_order_schema(values_to_frame(headers, rows)))
+                    recent_rows = (recent_rows + rows)[-self.tail_size:] if self.tail_size else []
+                    rows_fetched += block_rows
+                    # Trailing blank rows are trimmed from each block's response
+                    blank_rows = expected - block_rows
+
+        self._full_synced_at = time.time()
+
+        if headers is None:
+            self._set_snapshot(pd.DataFrame(), None, [])
+            self.last_sync = {'mode': 'full', 'rows_fetched': 0}
+            return self._frame
+
+        frame = concat_snapshots(*frames) if len(frames) > 1 else (
+            frames[0] if frames else apply_order_schema(values_to_frame(headers, [])))
+        self._set_snapshot(frame, headers, recent_rows)
+        self.last_sync = {'mode': 'full', 'rows_fetched': rows_fetched}
+        return self._frame
+
+    def _incremental_sync(self):
+        # Data row i is sheet row i + 2 (row 1 is the header)
+        tail_start = self._row_count - len(self._tail)
+        result = self.execute(self._values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[
+                f"{self.sheet_name}!A1:{self.last_column}1",
+                f"{self.sheet_name}!A{tail_start + 2}:{self.last_column}"
+            ]
+        ))
+        header_range, rows_range = result.get('valueRanges', [{}, {}])
+        headers = (header_range.get('values') or [[]])[0]
+        rows = rows_range.get('values', [])
+
+        if headers != self._headers or _fingerprint(rows[:len(self._tail)]) != _fingerprint(self._tail):
+            # Something above the new rows changed - the appended rows can't be trusted
+            return self._full_sync()
+
+        new_rows = rows[len(self._tail):]
+        if not new_rows:
+            self._synced_at = time.time()
+            self.last_sync = {'mode': 'unchanged', 'rows_fetched': len(rows)}
+            return self._frame
+
+        new_frame = apply_order_schema(values_to_frame(headers, new_rows))
+        frame = concat_snapshots(self._frame, new_frame) if not self._frame.empty else new_frame
+        self._set_snapshot(frame, headers, self._tail + new_rows)
+        self.last_sync = {'mode': 'incremental', 'rows_fetched': len(rows)}
+        return self._frame
+
+    def _set_snapshot(self, frame, headers, rows):
+        """Swap in a new snapshot - rows are the latest raw rows, of which the tail is kept"""
+        # Stamp the snapshot so per-snapshot indexes (e.g. the date index) are built once
+        frame.attrs['snapshot_id'] = uuid.uuid4().hex
+        self._frame = frame
+        self._headers = headers
+        self._row_count = len(frame)
+        self._tail = rows[-self.tail_size:] if self.tail_size else []
+        self._synced_at = time.time()
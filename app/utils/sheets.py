@@ -1,188 +1,184 @@
 import streamlit as st
 import pandas as pd
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+from .sheets_client import background_sheets_access, execute_sheets_request, get_sheets_values_api
+from .sheet_sync import SheetSync
+from .snapshot_store import load_snapshot, save_snapshot, snapshot_path
+from .snapshot_refresh import SnapshotRefresher
 
 # Constants
 # SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 # SPREADSHEET_ID = st.secrets.general.id
 # SHEET_NAMES = ['LIST_CREATION']
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SPREADSHEET_ID = st.secrets.general.id
 SHEET_NAMES = ['LIST_CREATION']
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource
+def _get_sheet_refresher():
+    """Process-wide snapshot of the LIST_CREATION sheet, kept fresh in the background.
+    
+    Nothing here may call Streamlit once the refresher is running - fetch runs on a background thread.
+    """
+    # The shared service, transport pool and scheduler are resolved here, on the script thread
+    values_api, execute = background_sheets_access()
+    sheet_sync = SheetSync(values_api, SPREADSHEET_ID, SHEET_NAMES[0], execute=execute)
+    path = snapshot_path(SHEET_NAMES[0])
+    
+    def fetch(force_full=False):
+        # Columns A to L; the first row is the header. The sync coerces the typed schema
+        # (DATE, QUANTITY, PRICE, categorical dimensions) and stamps a snapshot id.
+        # Background refreshes sync incrementally; force_full re-reads the whole sheet.
+        df = sheet_sync.sync(force_full=force_full)
+        # Persist changed snapshots so new processes start from disk
+        if sheet_sync.last_sync.get('mode') in ('full', 'incremental'):
+            save_snapshot(df, path, sheet_sync.get_state())
+        return df
+    
+    refresher = SnapshotRefresher(fetch, max_age=300)  # Refresh after 5 minutes
+    
+    # Serve the snapshot saved on disk (by this or another process) right away
+    try:
+        snapshot = load_snapshot(path)
+        if snapshot is not None and sheet_sync.restore(*snapshot):
+            refresher.set_snapshot(snapshot[0], fetched_at=sheet_sync.synced_at)
+    except Exception as e:
+        st.warning(f"Could not load saved sheet snapshot: {str(e)}")
+    return refresher
+
 def get_google_sheets_data():
-    """Fetch data from Google Sheets with timeout handling"""
+    """Fetch data from Google Sheets - serves the last snapshot and refreshes it in the background.
+    
+    Only the first load in a process without a saved snapshot waits for the Sheets API. The result
+    is a shallow copy shared with other sessions, so add or replace columns rather than editing values.
+    """
     try:
-        credentials = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"],scopes=SCOPES)
-        # Authenticate with Google Sheets API
-        service = build('sheets', 'v4', credentials=credentials)
-        sheet = service.spreadsheets()
-        
-        # Fetch data from the sheet with timeout
-        result = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"{SHEET_NAMES[0]}!A:L"  # Assuming 12 columns (A to L)
-        ).execute()
+        refresher = _get_sheet_refresher()
+        df = refresher.get()
         
-        values = result.get('values', [])
+        if refresher.last_error:
+            st.warning(f"Could not refresh data from Google Sheets, showing the last snapshot: {refresher.last_error}")
         
-        if not values:
+        if df.empty:
             st.error("No data found in the sheet")
             return pd.DataFrame()
         
-        # Convert to DataFrame with proper handling of missing columns
-        headers = values[0]
-        data = values[1:]
-        
-        # Ensure all rows have the same number of columns as the header
-        for i in range(len(data)):
-            # Extend rows that are too short
-            while len(data[i]) < len(headers):
-                data[i].append('')
-            # Truncate rows that are too long
-            if len(data[i]) > len(headers):
-                data[i] = data[i][:len(headers)]
-                
-        df = pd.DataFrame(data, columns=headers)  # First row as header
-        
-        # Debug: Check Telugu name encoding
-        if 'TELUGU NAME' in df.columns:
-            st.sidebar.write("**Debug - Telugu Names Sample:**")
-            sample_telugu = df['TELUGU NAME'].dropna().head(3).tolist()
-            for i, name in enumerate(sample_telugu):
-                st.sidebar.write(f"{i+1}. {repr(name)} -> {name}")
-        
         return df
         
     except Exception as e:
         st.error(f"Error fetching data from Google Sheets: {str(e)}")
         return pd.DataFrame()
 
+def refresh_google_sheets_data():
+    """Re-read the whole sheet now, waiting for the Sheets API - returns (success, message).
+    
+    A full read, so edits to any row show up, not just rows appended since the last sync.
+    """
+    try:
+        _get_sheet_refresher().refresh(force_full=True)
+        return True, "Data refreshed from Google Sheets!"
+    except Exception as e:
+        return False, f"Error fetching data from Google Sheets: {str(e)}"
+
+def get_sheet_data_age():
+    """Seconds since the sheet snapshot was fetched, and whether a background refresh is running"""
+    refresher = _get_sheet_refresher()
+    return refresher.age(), refresher.refreshing
+
+def column_letter(index):
+    """A1-notation column letters for a 0-based column index (0 -> A, 25 -> Z, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _index_rows_for_date(headers, rows, date_str):
+    """Map (DATE, PIVOT_VEGETABLE_NAME, UNITS) to sheet row numbers, for rows dated date_str only.
+    
+    One pass over the raw rows; column positions are looked up once from the header row.
+    """
+    columns = [str(header).strip().upper() for header in headers]
+    date_idx = columns.index('DATE')
+    veg_name_idx = columns.index('PIVOT_VEGETABLE_NAME')
+    units_idx = columns.index('UNITS')
+    last_idx = max(date_idx, veg_name_idx, units_idx)
+    
+    row_index = {}
+    for row_number, row in enumerate(rows, start=2):  # Row 1 is the header
+        if len(row) > last_idx and row[date_idx].strip() == date_str:
+            key = (date_str, row[veg_name_idx].strip(), row[units_idx].strip())
+            row_index.setdefault(key, []).append(row_number)
+    return row_index
+
 def update_google_sheets_prices(prices_data, selected_date):
-    """Update actual prices in Google Sheets"""
+    """Update actual prices in Google Sheets - one read of the sheet and one batchUpdate"""
     try:
-        # Authenticate with Google Sheets API
-        credentials = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"],scopes=SCOPES)
-        service = build('sheets', 'v4', credentials=credentials)
-        sheet = service.spreadsheets()
+        values_api = get_sheets_values_api()
         
         # Format date for comparison
         date_str = selected_date.strftime('%d/%m/%Y')  # Format used in Google Sheets
         
-        # First get the data as a DataFrame for easier filtering
-        df = get_google_sheets_data()
-        if df.empty:
-            return False, "No data found in Google Sheets"
+        # Read the sheet itself rather than the cached snapshot - row numbers must be current
+        result = execute_sheets_request(values_api.get(
+            spreadsheetId=SPREADSHEET_ID,
+            range=f"{SHEET_NAMES[0]}"
+        ))
         
-        # Make sure all column names are uppercase for consistency
-        df.columns = [col.upper() for col in df.columns]
+        all_values = result.get('values', [])
+        if not all_values:
+            return False, "No data found in Google Sheets"
         
-        # Add ACTUAL PRICE column if it doesn't exist
-        if 'ACTUAL PRICE' not in df.columns:
-            df['ACTUAL PRICE'] = ''
-            
-            # Get the original sheet data to update headers
-            result = sheet.values().get(
-                spreadsheetId=SPREADSHEET_ID,
-                range=f"{SHEET_NAMES[0]}!1:1"  # Just get headers
-            ).execute()
-            
-            headers = result.get('values', [[]])[0]
-            headers.append('ACTUAL PRICE')
-            
-            # Update the headers in Google Sheets
-            sheet.values().update(
-                spreadsheetId=SPREADSHEET_ID,
-                range=f"{SHEET_NAMES[0]}!A1:{chr(65 + len(headers) - 1)}1",
-                valueInputOption='USER_ENTERED',
-                body={'values': [headers]}
-            ).execute()
+        headers = all_values[0]
+        columns = [str(header).strip().upper() for header in headers]
         
         # Check required columns exist
-        required_columns = ['DATE', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'ACTUAL PRICE']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        required_columns = ['DATE', 'PIVOT_VEGETABLE_NAME', 'UNITS']
+        missing_columns = [col for col in required_columns if col not in columns]
         if missing_columns:
             return False, f"Missing required columns in Google Sheets: {missing_columns}"
         
-        # Filter only rows for the selected date
-        date_df = df[df['DATE'] == date_str]
-        if date_df.empty:
+        row_index = _index_rows_for_date(headers, all_values[1:], date_str)
+        if not row_index:
             return False, f"No entries found for date {date_str} in Google Sheets"
         
-        # Get the original sheet data to find row indices
-        result = sheet.values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=f"{SHEET_NAMES[0]}"
-        ).execute()
+        batch_updates = []
         
-        all_values = result.get('values', [])
-        if not all_values:
-            return False, "No data found in Google Sheets"
-            
-        headers = all_values[0]
-        actual_price_col_idx = headers.index('ACTUAL PRICE') if 'ACTUAL PRICE' in headers else len(headers)
+        # Add the ACTUAL PRICE header in the same batch if the column doesn't exist yet
+        if 'ACTUAL PRICE' in columns:
+            actual_price_col = column_letter(columns.index('ACTUAL PRICE'))
+        else:
+            actual_price_col = column_letter(len(headers))
+            batch_updates.append({
+                'range': f"{SHEET_NAMES[0]}!{actual_price_col}1",
+                'values': [['ACTUAL PRICE']]
+            })
         
-        # Prepare batch updates
-        batch_updates = []
         updates_count = 0
-        
-        # For each price entry, find matching row in the filtered dataframe
         for price_item in prices_data:
-            veg_name = price_item['vegetable_name']
-            units = price_item['units']
             price = price_item['actual_price']
-            
             if price == 0:
                 continue  # Skip zero prices
             
-            # Find matching rows in the sheet data
-            for i, row in enumerate(all_values[1:], start=2):  # Start from 2 for 1-indexing and header
-                if len(row) <= 2:  # Skip very short rows
-                    continue
-                    
-                try:
-                    date_col_idx = headers.index('DATE')
-                    veg_name_col_idx = headers.index('PIVOT_VEGETABLE_NAME')
-                    units_col_idx = headers.index('UNITS')
-                    
-                    # Make sure row has enough elements
-                    if (len(row) > date_col_idx and 
-                        len(row) > veg_name_col_idx and 
-                        len(row) > units_col_idx):
-                        
-                        # Check for exact match
-                        if (row[date_col_idx] == date_str and 
-                            row[veg_name_col_idx].strip() == veg_name.strip() and 
-                            row[units_col_idx].strip() == units.strip()):
-                            
-                            # Add to batch update
-                            cell_range = f"{SHEET_NAMES[0]}!{chr(65 + actual_price_col_idx)}{i}"
-                            batch_updates.append({
-                                'range': cell_range,
-                                'values': [[str(price)]]
-                            })
-                            updates_count += 1
-                except (IndexError, ValueError) as e:
-                    st.sidebar.write(f"Error processing row {i}: {str(e)}")
-                    continue  # Skip problematic rows
+            key = (date_str, price_item['vegetable_name'].strip(), price_item['units'].strip())
+            for row_number in row_index.get(key, []):
+                batch_updates.append({
+                    'range': f"{SHEET_NAMES[0]}!{actual_price_col}{row_number}",
+                    'values': [[str(price)]]
+                })
+                updates_count += 1
         
         if updates_count == 0:
             return False, "No matching rows found to update prices"
         
-        # Execute batch update
-        if batch_updates:
-            body = {
+        # Writing the same values twice is harmless, so server errors may be retried
+        execute_sheets_request(values_api.batchUpdate(
+            spreadsheetId=SPREADSHEET_ID,
+            body={
                 'valueInputOption': 'USER_ENTERED',
                 'data': batch_updates
             }
-            
-            service.spreadsheets().values().batchUpdate(
-                spreadsheetId=SPREADSHEET_ID,
-                body=body
-            ).execute()
+        ), idempotent=True)
         
         return True, f"Successfully updated {updates_count} price entries in Google Sheets"
         
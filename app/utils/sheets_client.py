@@ -0,0 +1,59 @@
+import json
+import streamlit as st
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
+from .sheets_scheduler import SheetsScheduler
+from .sheets_transport import SheetsTransportPool
+from .sheets_writer import SheetsWriter
+
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+@st.cache_resource
+def _get_sheets_api():
+    """Process-wide Sheets service and transport pool, created once.
+
+    The service only builds requests - it is built once from the discovery document shipped with
+    google-api-python-client (no network fetch). Requests are sent on transports from the pool, which
+    every thread shares, so no rerun, refresh or worker thread builds a client of its own.
+    """
+    credentials = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"], scopes=SCOPES)
+    service = build_from_document(json.loads(get_static_doc('sheets', 'v4')), credentials=credentials)
+    return service, SheetsTransportPool(lambda: AuthorizedHttp(credentials, http=build_http()))
+
+def get_sheets_service():
+    """Process-wide Sheets API service - use it to build requests and send them with execute_sheets_request"""
+    return _get_sheets_api()[0]
+
+def get_sheets_values_api():
+    """Values resource (spreadsheets().values()) of the process-wide service"""
+    return get_sheets_service().spreadsheets().values()
+
+def get_sheets_transport_pool():
+    """Pool of authorized transports that Sheets requests are sent on"""
+    return _get_sheets_api()[1]
+
+def background_sheets_access():
+    """(values resource, execute function) that never call Streamlit - for background threads.
+
+    The service, transport pool and scheduler are resolved now, on the script thread.
+    """
+    values_api = get_sheets_values_api()
+    pool, scheduler = get_sheets_transport_pool(), get_sheets_scheduler()
+    return values_api, lambda request, idempotent=None: scheduler.execute(pool.wrap(request), idempotent=idempotent)
+
+@st.cache_resource
+def get_sheets_scheduler():
+    """Process-wide request scheduler - every Sheets call shares one quota budget"""
+    return SheetsScheduler(requests_per_minute=60)
+
+def execute_sheets_request(request, idempotent=None):
+    """Send a Sheets API request through the shared scheduler (rate limit, retries, coalescing) on a pooled transport"""
+    return get_sheets_scheduler().execute(get_sheets_transport_pool().wrap(request), idempotent=idempotent)
+
+@st.cache_resource
+def get_sheets_writer(spreadsheet_id):
+    """Process-wide writer for a spreadsheet - sheet metadata and header state are cached in it"""
+    return SheetsWriter(spreadsheet_id, get_sheets_service, execute_sheets_request)
@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+
+# Responses worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class SheetsRateLimitError(Exception):
+    """Google Sheets kept rejecting a request for exceeding the quota after all retries"""
+
+def _status_code(error):
+    """HTTP status of a googleapiclient HttpError (or anything with resp.status), else None"""
+    try:
+        return int(getattr(getattr(error, 'resp', None), 'status', None))
+    except (TypeError, ValueError):
+        return None
+
+def _retry_after(error):
+    """Seconds from a Retry-After header on the error's response, if any"""
+    resp = getattr(error, 'resp', None)
+    try:
+        return float(resp.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts of up to `capacity`.
+
+    acquire() reserves a token and sleeps until it is due, so concurrent callers are served in
+    the order they arrived instead of all waking up at once.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def acquire(self):
+        """Take one token, waiting if needed - returns the seconds waited"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+class _PendingRead:
+    """Result of a read that other threads are waiting on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SheetsScheduler:
+    """Run Sheets API requests within the per-user quota (about 60 requests a minute).
+
+    Every request takes a token from a shared bucket before it is sent. 429 responses are retried
+    with jittered exponential backoff (honouring Retry-After). 5xx responses are retried the
+    same way, but only for idempotent requests, because an append or addSheet may already have
+    gone through. When several threads issue the same read (same method and URI) at once, only
+    one request is sent and every caller gets its response, so callers must not modify it.
+
+    `request` is a googleapiclient HttpRequest or any object with execute(); method/uri are used
+    for coalescing and default idempotency when present.
+    """
+
+    def __init__(self, requests_per_minute=60, burst=5, max_retries=5, base_delay=1.0,
+                 max_delay=32.0, clock=time.monotonic, sleep=time.sleep):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst, clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._counters = {
+            'requests': 0,      # execute() calls
+            'sent': 0,          # HTTP requests sent, including retries
+            'coalesced': 0,     # reads answered by another caller's identical request
+            'throttled': 0,     # 429 responses
+            'server_errors': 0, # 5xx responses
+            'retries': 0,
+            'failures': 0,      # requests that raised after all retries
+            'wait_seconds': 0.0,
+        }
+
+    def execute(self, request, idempotent=None):
+        """Send a request (rate limited and retried) and return its response"""
+        method = getattr(request, 'method', None)
+        if idempotent is None:
+            idempotent = method in ('GET', 'PUT')
+        self._count('requests')
+
+        if method != 'GET' or getattr(request, 'uri', None) is None:
+            return self._send(request, idempotent)
+
+        key = (method, request.uri)
+        with self._lock:
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingRead()
+
+        if not leader:
+            self._count('coalesced')
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            pending.result = self._send(request, idempotent)
+            return pending.result
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    def stats(self):
+        """Copy of the request counters"""
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _send(self, request, idempotent):
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            if waited:
+                self._count('wait_seconds', waited)
+            self._count('sent')
+            try:
+                return request.execute()
+            except Exception as e:
+                status = _status_code(e)
+                if status == 429:
+                    self._count('throttled')
+                elif status in RETRYABLE_STATUSES:
+                    self._count('server_errors')
+
+                retryable = status == 429 or (idempotent and status in RETRYABLE_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    self._count('failures')
+                    if status == 429:
+                        raise SheetsRateLimitError(
+                            "Google Sheets API quota exceeded - please try again in a minute"
+                        ) from e
+                    raise
+
+                # Full jitter: spread retries from concurrent callers over the backoff window
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0.0)
+                self._count('retries')
+                self._count('wait_seconds', delay)
+                self._sleep(delay)
+                attempt += 1
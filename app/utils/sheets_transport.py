@@ -0,0 +1,54 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+class SheetsTransportPool:
+    """Authorized HTTP transports for the Sheets API, shared by every thread in the process.
+
+    A transport (httplib2 connection plus auth) must not be used by two requests at once, so each
+    request checks one out for the length of its execute() and returns it afterwards. A new transport
+    is only built when every existing one is busy, so the pool grows to the peak number of concurrent
+    requests and is reused from then on - by page reruns, background refreshes and read workers alike.
+
+    `build_transport` returns a new transport, e.g. an AuthorizedHttp over the shared credentials.
+    """
+
+    def __init__(self, build_transport):
+        self.build_transport = build_transport
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @contextmanager
+    def transport(self):
+        """Check out an idle transport (building one if none is idle) and return it afterwards"""
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = self.build_transport()
+            with self._lock:
+                self.created += 1
+        try:
+            yield http
+        finally:
+            self._idle.put(http)
+
+    def wrap(self, request):
+        """The request, executed on a pooled transport instead of the one it was built with"""
+        return PooledRequest(request, self)
+
+class PooledRequest:
+    """A googleapiclient HttpRequest that runs on a transport from a SheetsTransportPool.
+
+    method and uri are passed through, so the scheduler can still coalesce and classify it.
+    """
+
+    def __init__(self, request, pool):
+        self.request = request
+        self.pool = pool
+        self.method = getattr(request, 'method', None)
+        self.uri = getattr(request, 'uri', None)
+
+    def execute(self):
+        with self.pool.transport() as http:
+            return self.request.execute(http=http)
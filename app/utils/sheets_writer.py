@@ -0,0 +1,117 @@
+import random
+import threading
+import pandas as pd
+from .schema import DATE_FORMAT
+
+def frame_to_values(df):
+    """Rows of a DataFrame as JSON-safe cell values, converted column by column.
+
+    Datetimes are written as DATE_FORMAT text (as in the orders sheet), missing values as ''
+    and numpy scalars as plain Python numbers.
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime(DATE_FORMAT)
+        values = values.astype(object)
+        columns[column] = values.where(values.notna(), '')
+    return pd.DataFrame(columns, index=df.index).to_numpy(dtype=object).tolist()
+
+def _cell(value):
+    """CellData for appendCells, typed like a RAW values write"""
+    if isinstance(value, bool):
+        return {'userEnteredValue': {'boolValue': value}}
+    if isinstance(value, (int, float)):
+        return {'userEnteredValue': {'numberValue': value}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+def _quote(sheet_name):
+    """Sheet name as used in A1 ranges - quoted so names with spaces work"""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+class SheetsWriter:
+    """Append rows to the sheets of one spreadsheet with a single request per save.
+
+    Sheet ids, and whether each sheet already starts with a header, are looked up once and then
+    cached, so a save is one values.append - or, for a sheet that doesn't exist yet, one
+    batchUpdate that adds the sheet and writes the header and rows together. If a write fails
+    the cache is dropped, in case the sheet was renamed or deleted in the meantime.
+    """
+
+    def __init__(self, spreadsheet_id, get_service, execute):
+        self.spreadsheet_id = spreadsheet_id
+        self.get_service = get_service
+        self.execute = execute
+        self._lock = threading.Lock()
+        self._sheets = None  # title -> {'sheet_id': int, 'has_header': bool or None (unknown)}
+
+    def append_frame(self, sheet_name, df):
+        """Append a DataFrame's rows, writing its columns as the header if the sheet has none"""
+        return self.append_rows(sheet_name, [str(column) for column in df.columns], frame_to_values(df))
+
+    def append_rows(self, sheet_name, header, rows):
+        """Append rows (lists of JSON-safe values) - returns the API response"""
+        # One save at a time, so two saves can't both try to add the same sheet
+        with self._lock:
+            try:
+                sheets = self._load_sheets()
+                state = sheets.get(sheet_name)
+                if state is None:
+                    return self._add_sheet_with_rows(sheets, sheet_name, header, rows)
+
+                if state['has_header'] is None:
+                    state['has_header'] = self._has_header(sheet_name)
+                values = rows if state['has_header'] else [header] + rows
+                response = self.execute(self.get_service().spreadsheets().values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"{_quote(sheet_name)}!A1",
+                    valueInputOption='RAW',
+                    insertDataOption='INSERT_ROWS',
+                    body={'values': values}
+                ))
+                state['has_header'] = True
+                return response
+            except Exception:
+                self._sheets = None
+                raise
+
+    def _load_sheets(self):
+        if self._sheets is None:
+            metadata = self.execute(self.get_service().spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='sheets.properties(sheetId,title)'
+            ))
+            self._sheets = {
+                sheet['properties']['title']: {'sheet_id': sheet['properties']['sheetId'], 'has_header': None}
+                for sheet in metadata.get('sheets', [])
+            }
+        return self._sheets
+
+    def _has_header(self, sheet_name):
+        result = self.execute(self.get_service().spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{_quote(sheet_name)}!A1"
+        ))
+        return bool(result.get('values'))
+
+    def _add_sheet_with_rows(self, sheets, sheet_name, header, rows):
+        # Choose the new sheet's id so appendCells can target it in the same batchUpdate
+        used_ids = {state['sheet_id'] for state in sheets.values()}
+        sheet_id = random.randint(1, 2 ** 31 - 1)
+        while sheet_id in used_ids:
+            sheet_id = random.randint(1, 2 ** 31 - 1)
+
+        response = self.execute(self.get_service().spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={'requests': [
+                {'addSheet': {'properties': {'title': sheet_name, 'sheetId': sheet_id}}},
+                {'appendCells': {
+                    'sheetId': sheet_id,
+                    'rows': [{'values': [_cell(value) for value in row]} for row in [header] + rows],
+                    'fields': 'userEnteredValue'
+                }}
+            ]}
+        ))
+        sheets[sheet_name] = {'sheet_id': sheet_id, 'has_header': True}
+        return response
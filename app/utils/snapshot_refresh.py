@@ -0,0 +1,79 @@
+import threading
+import time
+
+class SnapshotRefresher:
+    """Serve the latest snapshot immediately and refresh it in the background (stale-while-revalidate).
+
+    `fetch` returns a fresh DataFrame. It runs on a background thread, so it must not call
+    Streamlit; failures are kept in `last_error` and the previous snapshot keeps being served.
+    Only the very first load, when there is nothing to serve yet, waits for `fetch`.
+    """
+
+    def __init__(self, fetch, max_age=300):
+        self.fetch = fetch
+        self.max_age = max_age
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._snapshot = None
+        self._fetched_at = None
+        self._refresh_due = None
+        self._refreshing = False
+
+    def set_snapshot(self, df, fetched_at=None):
+        """Swap in a new snapshot - readers see either the old or the new one"""
+        with self._lock:
+            self._snapshot = df
+            self._fetched_at = time.time() if fetched_at is None else fetched_at
+            self._refresh_due = self._fetched_at + self.max_age
+
+    def get(self):
+        """Current snapshot as a shallow copy - callers must not modify column data in place"""
+        with self._lock:
+            snapshot, refresh_due = self._snapshot, self._refresh_due
+
+        if snapshot is None:
+            snapshot = self.refresh()
+        elif time.time() > refresh_due:
+            self.refresh_in_background()
+        return snapshot.copy(deep=False)
+
+    def age(self):
+        """Seconds since the current snapshot was fetched, or None before the first load"""
+        with self._lock:
+            return None if self._fetched_at is None else time.time() - self._fetched_at
+
+    @property
+    def refreshing(self):
+        return self._refreshing
+
+    def refresh(self, **fetch_options):
+        """Fetch now and swap in the result - errors are raised to the caller.
+
+        fetch_options are passed to `fetch`; background and first-load refreshes pass none.
+        """
+        with self._refresh_lock:
+            df = self.fetch(**fetch_options)
+            self.set_snapshot(df)
+            self.last_error = None
+            return df
+
+    def refresh_in_background(self):
+        """Start a background refresh unless one is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = str(e)
+            # Retry after another max_age rather than on every page render
+            with self._lock:
+                self._refresh_due = time.time() + self.max_age
+        finally:
+            with self._lock:
+                self._refreshing = False
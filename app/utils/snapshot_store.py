@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+
+# pyarrow is optional - without it snapshots are simply not persisted
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+# Bump when the typed schema changes so snapshots written by older code are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+SNAPSHOT_DIR = os.environ.get('HOTEL_REPORTS_SNAPSHOT_DIR', os.path.join(tempfile.gettempdir(), 'hotel_reports'))
+
+def snapshot_path(name):
+    """Path of the Arrow IPC snapshot file for a sheet"""
+    return os.path.join(SNAPSHOT_DIR, f"{name}.arrow")
+
+def save_snapshot(df, path, state):
+    """Write a typed snapshot and its sync state to an Arrow IPC file.
+
+    The file is written next to its final path and renamed into place, so readers in other
+    processes see either the old or the new snapshot, never a partial one.
+    Returns False when pyarrow is not installed.
+    """
+    if pa is None:
+        return False
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'snapshot_format_version'] = str(SNAPSHOT_FORMAT_VERSION).encode()
+    metadata[b'sync_state'] = json.dumps(state, ensure_ascii=False).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return True
+
+def load_snapshot(path):
+    """Load a snapshot memory-mapped from disk.
+
+    Returns (DataFrame, sync state), or None when pyarrow is missing, there is no file, or the
+    file was written with another SNAPSHOT_FORMAT_VERSION. The gain is skipping the download and
+    parse, not memory: only the categorical codes, DATE and numeric columns without missing values
+    stay backed by the mapped file. Category values (the strings), bool columns and numeric
+    columns with gaps are copied into each process.
+    """
+    if pa is None or not os.path.exists(path):
+        return None
+
+    with pa.memory_map(path, 'r') as source:
+        table = ipc.open_file(source).read_all()
+
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'snapshot_format_version') != str(SNAPSHOT_FORMAT_VERSION).encode():
+        return None
+
+    state = json.loads(metadata[b'sync_state'].decode('utf-8'))
+    return table.to_pandas(split_blocks=True), state
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Hotels and kitchens orders are expected for - compared after stripping spaces and upper-casing
+KNOWN_HOTELS = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', 'BHEEMILI']
+KNOWN_KITCHENS = [
+    'EATS', 'BANQUETS KITCHEN', 'STAFF CANTEEN', 'GRANDBAY', 'MAIN KITCHEN',
+    'ZAFFRAN KITCHEN', 'BHEEMILI NOVOTEL', 'BHEEMILI MAIN KITCHEN', 'INFINTY KITCHEN'
+]
+
+# One bit per issue in the ROW_ISSUES column: flag -> (field, description)
+ISSUE_FLAGS = {
+    1: ('DATE', 'Missing date'),
+    2: ('DATE', 'Date is not in dd/mm/yyyy format'),
+    4: ('QUANTITY', 'Missing quantity'),
+    8: ('QUANTITY', 'Quantity is not a number'),
+    16: ('QUANTITY', 'Negative quantity'),
+    32: ('PRICE', 'Price is not a number'),
+    64: ('PRICE', 'Negative price'),
+    128: ('MAIN HOTEL NAME', 'Unknown hotel'),
+    256: ('KITCHEN NAME', 'Unknown kitchen'),
+    512: ('TELUGU NAME', 'Missing Telugu name'),
+}
+
+# Columns shown next to each issue to help find the row in the sheet
+ISSUE_CONTEXT_COLUMNS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'PIVOT_VEGETABLE_NAME', 'UNITS']
+
+def _unknown_values(values, known):
+    """Mask of values not in known, comparing stripped upper-case text once per distinct value"""
+    known = set(known)
+    accepted = [value for value in pd.unique(values.dropna()) if str(value).strip().upper() in known]
+    return ~values.isin(accepted)
+
+def flag_row_issues(df, blank, unparsed):
+    """Bit flags (see ISSUE_FLAGS) for every row of a typed order frame.
+
+    blank and unparsed map DATE, QUANTITY and PRICE to masks of cells that were empty in the
+    sheet, or non-empty but could not be parsed - the typed columns hold NaN/NaT for both.
+    """
+    flags = np.zeros(len(df), dtype=np.uint16)
+
+    def flag(bit, mask):
+        flags[np.asarray(mask, dtype=bool)] |= bit
+
+    if 'DATE' in df.columns:
+        flag(1, blank['DATE'])
+        flag(2, unparsed['DATE'])
+    if 'QUANTITY' in df.columns:
+        flag(4, blank['QUANTITY'])
+        flag(8, unparsed['QUANTITY'])
+        flag(16, df['QUANTITY'] < 0)
+    if 'PRICE' in df.columns:
+        # Blank prices are expected - they are filled in later from Price Management
+        flag(32, unparsed['PRICE'])
+        flag(64, df['PRICE'] < 0)
+    if 'MAIN HOTEL NAME' in df.columns:
+        flag(128, _unknown_values(df['MAIN HOTEL NAME'], KNOWN_HOTELS))
+    if 'KITCHEN NAME' in df.columns:
+        flag(256, _unknown_values(df['KITCHEN NAME'], KNOWN_KITCHENS))
+    if 'TELUGU NAME' in df.columns:
+        flag(512, df['TELUGU NAME'].isin(['']) | df['TELUGU NAME'].isna())
+
+    return pd.Series(flags, index=df.index, name='ROW_ISSUES')
+
+def build_issues_table(df):
+    """Expand ROW_ISSUES into one row per issue: sheet row number, context columns, FIELD and ISSUE.
+
+    Sheet rows are numbered as in Google Sheets (header is row 1), so df must be the whole snapshot
+    or keep the snapshot's index.
+    """
+    columns = ['SHEET ROW'] + ISSUE_CONTEXT_COLUMNS + ['FIELD', 'ISSUE']
+    if df.empty or 'ROW_ISSUES' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    flags = df['ROW_ISSUES'].to_numpy()
+    flagged = flags != 0
+    if not flagged.any():
+        return pd.DataFrame(columns=columns)
+
+    context_columns = [column for column in ISSUE_CONTEXT_COLUMNS if column in df.columns]
+    rows = df.loc[flagged, context_columns]
+    rows.insert(0, 'SHEET ROW', df.index[flagged] + 2)
+    row_flags = flags[flagged]
+
+    issues = []
+    for bit, (field, description) in ISSUE_FLAGS.items():
+        has_issue = (row_flags & bit) != 0
+        if has_issue.any():
+            issues.append(rows[has_issue].assign(FIELD=field, ISSUE=description))
+
+    return pd.concat(issues).sort_values('SHEET ROW', kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,15 @@
+import sys
+import types
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+# The app imports modules as utils.x / database.x. The package __init__ files import the Sheets
+# page helpers, which read st.secrets at import time - register the packages without running
+# them so the modules under test can be imported without app secrets.
+for package in ('utils', 'database'):
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [str(APP_DIR / package)]
+        sys.modules[package] = module
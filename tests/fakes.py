@@ -0,0 +1,42 @@
+import re
+
+class FakeRequest:
+    """Stand-in for a googleapiclient HttpRequest - execute() runs `respond`"""
+
+    def __init__(self, respond, method='GET', uri=None):
+        self.respond = respond
+        self.method = method
+        self.uri = uri
+        self.executions = 0
+
+    def execute(self):
+        self.executions += 1
+        return self.respond()
+
+class FakeValuesApi:
+    """In-memory spreadsheets().values() for one sheet: `rows` holds the raw rows, header first.
+
+    Every get/batchGet is recorded in `calls` as (method, ranges).
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def _read(self, a1_range):
+        match = re.fullmatch(r"[^!]+!A(\d+):[A-Z]+(\d*)", a1_range)
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else len(self.rows)
+        rows = [list(row) for row in self.rows[first - 1:last]]
+        # Like the API: trailing empty rows are not returned
+        while rows and not rows[-1]:
+            rows.pop()
+        return {'range': a1_range, 'values': rows} if rows else {'range': a1_range}
+
+    def get(self, spreadsheetId, range):
+        self.calls.append(('get', [range]))
+        return FakeRequest(lambda: self._read(range))
+
+    def batchGet(self, spreadsheetId, ranges):
+        self.calls.append(('batchGet', list(ranges)))
+        return FakeRequest(lambda: {'valueRanges': [self._read(r) for r in ranges]})
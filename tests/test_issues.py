@@ -0,0 +1,39 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from utils.data_processing import get_day_issues, get_issues_table
+from utils.schema import apply_order_schema
+from utils.sheet_sync import values_to_frame
+from utils.validation import build_issues_table
+
+HEADERS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME', 'QUANTITY', 'PRICE']
+ROWS = [
+    ['01/05/2024', 'NOVOTEL', 'EATS', 'V1', 'TOMATO', 'KGS', 'టమాట', '2', '30'],
+    ['01/05/2024', 'NOWHERE', 'EATS', 'V1', 'ONION', 'KGS', '', 'x', ''],
+    ['02/05/2024', 'NOVOTEL', 'NOWHERE', 'V2', 'TOMATO', 'KGS', 'టమాట', '-1', '30'],
+    ['', 'GRANDBAY', 'EATS', 'V2', 'CARROT', 'KGS', 'క్యారెట్', '', ''],
+    ['01/05/2024', 'GRANDBAY', 'EATS', 'V2', 'CARROT', 'KGS', 'క్యారెట్', '1', 'abc'],
+]
+
+def snapshot(snapshot_id='snap-1'):
+    df = apply_order_schema(values_to_frame(HEADERS, [list(row) for row in ROWS]))
+    df.attrs['snapshot_id'] = snapshot_id
+    return df
+
+def test_day_issues_match_filtering_the_full_table():
+    df = snapshot()
+    full = build_issues_table(df)
+    for day in ['2024-05-01', '2024-05-02', '2024-05-03']:
+        expected = full[full['DATE'] == pd.Timestamp(day)].reset_index(drop=True)
+        assert_frame_equal(get_day_issues(df, day).astype(object), expected.astype(object), check_index_type=False)
+
+def test_day_issues_keep_sheet_row_numbers():
+    issues = get_day_issues(snapshot(), '2024-05-01')
+    assert set(issues['SHEET ROW']) == {3, 6}
+
+def test_issues_table_is_built_once_per_snapshot():
+    df = snapshot('snap-cached')
+    first = get_issues_table(df)
+    assert get_issues_table(df) is first
+    assert_frame_equal(first, build_issues_table(df))
+    # A filtered frame keeps the attrs but not the snapshot's rows, so it is not served from the cache
+    assert len(get_issues_table(df.iloc[:2])) < len(first)
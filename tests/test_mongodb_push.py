@@ -0,0 +1,124 @@
+import datetime
+import pytest
+from utils.schema import apply_order_schema
+from utils.sheet_sync import values_to_frame
+
+mongomock = pytest.importorskip('mongomock')
+from database import mongodb
+from database.mongodb import build_order_documents, push_data_to_mongodb
+
+DAY = datetime.date(2024, 5, 1)
+DATE_STR = '2024-05-01'
+HEADERS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS',
+           'TELUGU NAME', 'QUANTITY', 'PRICE']
+
+def order_rows():
+    rows = []
+    for i in range(12):
+        rows.append(['01/05/2024' if i % 3 else '02/05/2024', ['NOVOTEL', 'GRANDBAY'][i % 2], 'MAIN KITCHEN',
+                     'V1', f'VEG{i % 5:03d}', 'KGS', f'తె{i % 5}', str(1 + i), '10' if i % 4 else ''])
+    return rows
+
+def sheet_frame(rows):
+    return apply_order_schema(values_to_frame(HEADERS, rows))
+
+@pytest.fixture
+def orders(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(mongodb, 'get_mongodb_connection', lambda: client)
+    return client[mongodb.DATABASE_NAME]['vegetable_orders']
+
+def push(rows):
+    success, message = push_data_to_mongodb(sheet_frame(rows), DAY)
+    assert success, message
+    return message
+
+def stored_day(orders):
+    return {doc['row_key']: doc for doc in orders.find({'formatted_date': DATE_STR})}
+
+def test_documents_have_distinct_keys_for_repeated_rows():
+    rows = order_rows()
+    rows.append(list(rows[1]))
+    df = sheet_frame(rows)
+    documents = build_order_documents(df[df['DATE'] == '2024-05-01'], DATE_STR)
+
+    keys = [doc['row_key'] for doc in documents]
+    assert len(set(keys)) == len(keys)
+    # The copy is numbered after the earlier rows with the same natural key
+    assert not keys[-1].endswith('|0')
+    # Missing prices are stored as None, not NaN
+    assert any(doc['PRICE'] is None for doc in documents)
+    assert all('ROW_VALID' not in doc and 'ROW_ISSUES' not in doc for doc in documents)
+
+def test_first_push_writes_every_row(orders):
+    assert '(8 written, 0 removed, 0 unchanged)' in push(order_rows())
+    assert orders.count_documents({'formatted_date': DATE_STR}) == 8
+
+def test_unchanged_rows_are_not_rewritten(orders):
+    push(order_rows())
+    before = stored_day(orders)
+
+    assert '(0 written, 0 removed, 8 unchanged)' in push(order_rows())
+    after = stored_day(orders)
+    assert {key: doc['timestamp'] for key, doc in after.items()} == \
+        {key: doc['timestamp'] for key, doc in before.items()}
+
+def test_only_changed_rows_are_written(orders):
+    push(order_rows())
+    rows = order_rows()
+    rows[1][7] = '99'
+
+    assert '(1 written, 0 removed, 7 unchanged)' in push(rows)
+    changed = [doc for doc in stored_day(orders).values() if doc['QUANTITY'] == 99]
+    assert len(changed) == 1
+
+def test_removed_rows_are_deleted(orders):
+    push(order_rows())
+    rows = order_rows()
+    del rows[-1]  # Last row of the day
+
+    assert '(0 written, 1 removed, 7 unchanged)' in push(rows)
+    assert orders.count_documents({'formatted_date': DATE_STR}) == 7
+
+def test_legacy_documents_are_replaced(orders):
+    orders.insert_many([{'formatted_date': DATE_STR, 'QUANTITY': 1}, {'formatted_date': DATE_STR, 'QUANTITY': 2},
+                        {'formatted_date': '2024-05-02', 'QUANTITY': 3}])
+
+    assert '(8 written, 2 removed, 0 unchanged)' in push(order_rows())
+    assert orders.count_documents({'formatted_date': DATE_STR, 'row_key': {'$exists': False}}) == 0
+    assert orders.count_documents({'formatted_date': DATE_STR}) == 8
+    # Other days are left alone
+    assert orders.count_documents({'formatted_date': '2024-05-02'}) == 1
+
+def test_rows_shifted_by_an_insert_are_not_rewritten(orders):
+    push(order_rows())
+    before = stored_day(orders)
+    rows = order_rows()
+    rows.insert(0, ['02/05/2024', 'NOVOTEL', 'MAIN KITCHEN', 'V1', 'VEG009', 'KGS', '', '1', '10'])
+
+    assert '(0 written, 0 removed, 8 unchanged)' in push(rows)
+    after = stored_day(orders)
+    for key, doc in after.items():
+        # Content and timestamp are kept; only the sheet position follows the sheet
+        assert doc['content_hash'] == before[key]['content_hash']
+        assert doc['timestamp'] == before[key]['timestamp']
+        assert doc['sheet_row'] == before[key]['sheet_row'] + 1
+
+def test_price_reads_see_saves_from_other_processes(monkeypatch):
+    client = mongomock.MongoClient()
+    db = client[mongodb.DATABASE_NAME]
+    monkeypatch.setattr(mongodb, 'get_mongodb_connection', lambda: client)
+    monkeypatch.setattr(mongodb, 'get_database', lambda: db)
+    day = datetime.date(2031, 1, 2)
+
+    success, message = mongodb.save_vegetable_prices([{'vegetable_name': 'VEG000', 'units': 'KGS', 'price': 10.0}], day)
+    assert success, message
+    assert mongodb.get_vegetable_prices(day)['price'].tolist() == [10.0]
+
+    # Another server process replaces the day's prices - nothing in this process is told about it
+    db['vegetable_prices'].delete_many({'date': '2031-01-02'})
+    db['vegetable_prices'].insert_many([
+        {'vegetable_name': 'VEG000', 'units': 'KGS', 'price': 12.0, 'date': '2031-01-02',
+         'timestamp': datetime.datetime.now() + datetime.timedelta(seconds=1)},
+    ])
+    assert mongodb.get_vegetable_prices(day)['price'].tolist() == [12.0]
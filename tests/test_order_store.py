@@ -0,0 +1,132 @@
+import datetime
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from utils.data_processing import ORDER_CUBE_COLUMNS, build_order_cube, process_data_for_range
+from utils.schema import DERIVED_COLUMNS, apply_order_schema
+from utils.sheet_sync import values_to_frame
+
+mongomock = pytest.importorskip('mongomock')
+from database import mongodb
+from database.order_store import OrderStore
+
+HEADERS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS',
+           'TELUGU NAME', 'QUANTITY', 'PRICE']
+DAYS = [datetime.date(2024, 5, day) for day in (1, 2, 3)]
+
+def order_rows():
+    # Days interleaved, as when orders are entered out of order
+    return [[f'0{1 + i % 3}/05/2024', ['NOVOTEL', 'GRANDBAY'][i % 2], 'MAIN KITCHEN', 'V1', f'VEG{i % 5:03d}',
+             'KGS', f'తె{i % 5}', str(i % 4), '10' if i % 3 else ''] for i in range(30)]
+
+@pytest.fixture
+def sheet():
+    return {'df': apply_order_schema(values_to_frame(HEADERS, order_rows()))}
+
+@pytest.fixture
+def db(monkeypatch, sheet):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(mongodb, 'get_mongodb_connection', lambda: client)
+    for day in DAYS[:2]:
+        success, message = mongodb.push_data_to_mongodb(sheet['df'], day)
+        assert success, message
+    return client[mongodb.DATABASE_NAME]
+
+def expected(df, start, end, columns=None):
+    rows = process_data_for_range(df, start, end).drop(columns=DERIVED_COLUMNS)
+    return rows if columns is None else rows[['DATE'] + columns]
+
+def assert_same_rows(got, want):
+    # Category sets differ by source - compare values
+    assert_frame_equal(got, want, check_categorical=False, check_dtype=False)
+    assert list(got.dtypes.astype(str)) == list(want.dtypes.astype(str))
+
+def test_sheet_is_the_default_source(db, sheet):
+    def no_db():
+        raise AssertionError("MongoDB should not be queried")
+    store = OrderStore(no_db, lambda: sheet['df'])
+
+    df, sources = store.get_orders(DAYS[0], DAYS[2])
+    assert_same_rows(df, expected(sheet['df'], DAYS[0], DAYS[2]))
+    assert sources == {'mongodb': [], 'sheets': ['2024-05-01', '2024-05-02', '2024-05-03'], 'error': None}
+
+def test_mongodb_serves_pushed_days_when_the_sheet_is_unavailable(db, sheet):
+    store = OrderStore(lambda: db, lambda: values_to_frame([], []))
+    df, sources = store.get_orders(DAYS[0], DAYS[2])
+    assert sources['mongodb'] == ['2024-05-01', '2024-05-02'] and sources['sheets'] == []
+    assert_same_rows(df, expected(sheet['df'], DAYS[0], DAYS[1]))
+
+@pytest.mark.parametrize('columns', [None, ['QUANTITY', 'MAIN HOTEL NAME']])
+def test_preferring_mongodb_matches_the_sheet(db, sheet, columns):
+    loads = []
+    store = OrderStore(lambda: db, lambda: loads.append(1) or sheet['df'])
+
+    df, sources = store.get_orders(DAYS[0], DAYS[1], columns=columns, prefer_mongodb=True)
+    assert sources['sheets'] == [] and not loads
+    assert_same_rows(df, expected(sheet['df'], DAYS[0], DAYS[1], columns))
+
+    # Days not pushed yet come from the sheet - combined rows are ordered by day, each in sheet order
+    df, sources = store.get_orders(DAYS[0], DAYS[2], columns=columns, prefer_mongodb=True)
+    assert sources['sheets'] == ['2024-05-03']
+    want = expected(sheet['df'], DAYS[0], DAYS[2], columns).sort_values('DATE', kind='mergesort')
+    assert_same_rows(df, want.reset_index(drop=True))
+
+def test_combined_rows_stay_grouped_when_sheet_rows_move(db, sheet):
+    # Rows were reordered in the sheet since the push, so pushed sheet rows collide with the snapshot's
+    sheet['df'] = apply_order_schema(values_to_frame(HEADERS, order_rows()[::-1]))
+    store = OrderStore(lambda: db, lambda: sheet['df'])
+
+    df, sources = store.get_orders(DAYS[0], DAYS[2], prefer_mongodb=True)
+    assert sources['mongodb'] == ['2024-05-01', '2024-05-02'] and sources['sheets'] == ['2024-05-03']
+    assert df.index.equals(pd.RangeIndex(len(df)))
+
+    pushed = store.read_pushed(DAYS[0], DAYS[1]).sort_values('DATE', kind='mergesort').reset_index(drop=True)
+    sheet_day = expected(sheet['df'], DAYS[2], DAYS[2]).reset_index(drop=True)
+    assert_same_rows(df.iloc[:len(pushed)].reset_index(drop=True), pushed)
+    assert_same_rows(df.iloc[len(pushed):].reset_index(drop=True), sheet_day)
+
+def test_mongodb_errors_fall_back_to_the_sheet(sheet):
+    def unreachable():
+        raise RuntimeError("server selection timeout")
+    store = OrderStore(unreachable, lambda: sheet['df'])
+
+    df, sources = store.get_orders(DAYS[0], DAYS[2], prefer_mongodb=True)
+    assert sources['error'] == "server selection timeout"
+    assert sources['sheets'] == ['2024-05-01', '2024-05-02', '2024-05-03']
+    assert_same_rows(df, expected(sheet['df'], DAYS[0], DAYS[2]))
+
+def test_check_consistency_reports_sheet_edits(db, sheet):
+    rows = order_rows()
+    rows[1][7] = '9'  # A 2024-05-02 order
+    sheet['df'] = apply_order_schema(values_to_frame(HEADERS, rows))
+    store = OrderStore(lambda: db, lambda: sheet['df'])
+
+    report = store.check_consistency(DAYS[0], DAYS[2]).set_index('DATE')
+    assert report['STATUS'].to_dict() == {
+        '2024-05-01': 'in sync', '2024-05-02': 'out of date', '2024-05-03': 'not pushed'}
+    assert report.loc['2024-05-02', 'CHANGED'] == 1
+
+def test_legacy_documents_get_the_sheet_null_policy(db, sheet):
+    db['vegetable_orders'].delete_many({})
+    db['vegetable_orders'].insert_many([
+        {'formatted_date': '2024-05-01', 'DATE': datetime.datetime(2024, 5, 1), 'MAIN HOTEL NAME': 'NOVOTEL',
+         'KITCHEN NAME': None, 'VENDOR': float('nan'), 'PIVOT_VEGETABLE_NAME': 'VEG001', 'UNITS': 'KGS',
+         'TELUGU NAME': 'nan', 'QUANTITY': '2', 'PRICE': None},
+        {'formatted_date': '2024-05-01', 'DATE': datetime.datetime(2024, 5, 1), 'MAIN HOTEL NAME': 'NOVOTEL',
+         'PIVOT_VEGETABLE_NAME': 'VEG002', 'UNITS': 'KGS', 'QUANTITY': 1.0},
+    ])
+    df = OrderStore(lambda: db, lambda: sheet['df']).read_pushed(DAYS[0], DAYS[0])
+
+    for column in ('KITCHEN NAME', 'VENDOR', 'TELUGU NAME'):
+        assert df[column].tolist() == ['', '']
+    assert df['QUANTITY'].tolist() == [2.0, 1.0]
+    assert df['PRICE'].isna().all()
+
+@pytest.mark.parametrize('prefer_mongodb', [False, True])
+def test_order_cube_columns_build_the_same_cube(db, sheet, prefer_mongodb):
+    store = OrderStore(lambda: db, lambda: sheet['df'])
+    full, _ = store.get_orders(DAYS[0], DAYS[0], prefer_mongodb=prefer_mongodb)
+    projected, _ = store.get_orders(DAYS[0], DAYS[0], columns=ORDER_CUBE_COLUMNS, prefer_mongodb=prefer_mongodb)
+
+    assert list(projected.columns) == ['DATE'] + ORDER_CUBE_COLUMNS
+    assert_frame_equal(build_order_cube(projected), build_order_cube(full))
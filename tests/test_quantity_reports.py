@@ -0,0 +1,83 @@
+import random
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from reports.formatting import format_quantity_report
+from utils.data_processing import create_vegetable_report_data, create_vendor_report_data, process_data_for_date
+from utils.schema import apply_order_schema
+from utils.sheet_sync import values_to_frame
+
+HEADERS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME', 'QUANTITY']
+HOTELS = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', ' BHEEMILI', 'ZHOTEL']
+DESIRED_HOTEL_ORDER = ['NOVOTEL', 'GRANDBAY', 'RADISSONBLU', ' BHEEMILI']
+
+def random_sheet(seed, n=400):
+    r = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        veg = r.randrange(25)
+        units = 'KGS' if veg % 4 else r.choice(['KGS', 'PCS'])
+        rows.append([r.choice(['01/05/2024', '02/05/2024']), r.choice(HOTELS), r.choice(['MAIN', 'EATS']),
+                     r.choice(['V1', 'V2', 'V3', '']), f'VEG{veg:02d}', units, f'తె{veg}',
+                     r.choice(['0.1', '0.2', '0.3', '0.7', '1.1', '2.2', '3.3', '0.25', '1', '0'])])
+    return rows
+
+def old_day_rows(rows, date_str):
+    """The day's rows as the old loop saw them: QUANTITY an object column of floats, zeros removed"""
+    day = [row for row in rows if row[0] == date_str]
+    df = pd.DataFrame(day, columns=HEADERS)
+    df['QUANTITY'] = pd.Series([float(q) for q in df['QUANTITY']], dtype=object)
+    return df[df['QUANTITY'] > 0]
+
+def old_hotels(df):
+    available_hotels = df['MAIN HOTEL NAME'].unique()
+    hotels = [hotel for hotel in DESIRED_HOTEL_ORDER if hotel in available_hotels]
+    return hotels + sorted([h for h in available_hotels if h not in DESIRED_HOTEL_ORDER])
+
+def old_quantity_report(df, hotels, total_column):
+    """The per-cell loop the reports were built with before they were vectorized"""
+    report_data = []
+    for _, row in df[['PIVOT_VEGETABLE_NAME', 'UNITS', 'TELUGU NAME']].drop_duplicates().iterrows():
+        veg_name, units, telugu_name = row['PIVOT_VEGETABLE_NAME'], row['UNITS'], row['TELUGU NAME']
+        veg_data = df[(df['PIVOT_VEGETABLE_NAME'] == veg_name) & (df['UNITS'] == units)]
+        if df[df['PIVOT_VEGETABLE_NAME'] == veg_name]['UNITS'].nunique() > 1:
+            display_name = f"{veg_name} ({units})"
+        else:
+            display_name = veg_name
+        report_row = {'PIVOT_VEGETABLE_NAME': display_name, 'Telugu Name': telugu_name}
+        total_qty = 0
+        for hotel in hotels:
+            hotel_data = veg_data[veg_data['MAIN HOTEL NAME'] == hotel]
+            qty = hotel_data['QUANTITY'].sum() if not hotel_data.empty else 0
+            report_row[f"{hotel}"] = f"{qty} {units}" if qty > 0 else f"0 {units}"
+            total_qty += qty
+        report_row[total_column] = f"{total_qty} {units}"
+        report_data.append(report_row)
+    result_df = pd.DataFrame(report_data)
+    return result_df.sort_values('PIVOT_VEGETABLE_NAME', ascending=True).reset_index(drop=True)
+
+def new_day_rows(rows, selected_date):
+    df, _ = process_data_for_date(apply_order_schema(values_to_frame(HEADERS, [list(row) for row in rows])), selected_date)
+    return df
+
+@pytest.mark.parametrize('seed', range(40))
+def test_vegetable_report_matches_old_loop(seed):
+    rows = random_sheet(seed)
+    old = old_day_rows(rows, '01/05/2024')
+    expected = old_quantity_report(old, old_hotels(old), 'Total Quantity')
+
+    report = create_vegetable_report_data(new_day_rows(rows, '2024-05-01'))
+    assert_frame_equal(format_quantity_report(report), expected, check_dtype=False)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_vendor_reports_match_old_loop(seed):
+    rows = random_sheet(seed)
+    old = old_day_rows(rows, '02/05/2024')
+    hotels = old_hotels(old)
+    reports = create_vendor_report_data(new_day_rows(rows, '2024-05-02'))
+
+    vendors = sorted(vendor for vendor in old['VENDOR'].unique() if vendor)
+    assert list(reports) == vendors
+    for vendor in vendors:
+        expected = old_quantity_report(old[old['VENDOR'] == vendor], hotels, 'Total')
+        assert_frame_equal(format_quantity_report(reports[vendor]), expected, check_dtype=False)
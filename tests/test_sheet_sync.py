@@ -0,0 +1,129 @@
+import pytest
+from pandas.testing import assert_frame_equal
+from utils.schema import apply_order_schema
+from utils.sheet_sync import SheetSync, values_to_frame
+from fakes import FakeValuesApi
+
+HEADERS = ['DATE', 'MAIN HOTEL NAME', 'KITCHEN NAME', 'VENDOR', 'PIVOT_VEGETABLE_NAME', 'UNITS',
+           'TELUGU NAME', 'QUANTITY', 'PRICE']
+
+def order_row(i, quantity=None):
+    return [f'{1 + i % 3:02d}/05/2024', ['NOVOTEL', 'GRANDBAY'][i % 2], 'MAIN KITCHEN', 'V1',
+            f'VEG{i % 7:03d}', 'KGS', f'తె{i % 7}', str(quantity if quantity is not None else 1 + i % 4), '10']
+
+def make_sheet(n, headers=HEADERS):
+    return [list(headers)] + [order_row(i) for i in range(n)]
+
+def expected_frame(sheet):
+    return apply_order_schema(values_to_frame(sheet[0], sheet[1:]))
+
+def make_sync(api, **options):
+    options.setdefault('tail_size', 5)
+    return SheetSync(api, 'spreadsheet', 'LIST_CREATION', last_column='I', **options)
+
+def test_first_sync_reads_whole_sheet():
+    api = FakeValuesApi(make_sheet(50))
+    df = make_sync(api, chunk_rows=8, parallel_reads=2).sync()
+    assert_frame_equal(df, expected_frame(api.rows))
+    assert all(method == 'get' for method, _ in api.calls)
+
+def test_empty_sheet_gives_empty_frame():
+    sync = make_sync(FakeValuesApi([]))
+    assert sync.sync().empty
+    assert sync.last_sync == {'mode': 'full', 'rows_fetched': 0}
+
+def test_appended_rows_are_read_incrementally():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    sync.sync()
+    api.rows += [order_row(i) for i in range(30, 34)]
+    api.calls.clear()
+
+    df = sync.sync()
+    assert sync.last_sync['mode'] == 'incremental'
+    assert api.calls == [('batchGet', ['LIST_CREATION!A1:I1', 'LIST_CREATION!A27:I'])]
+    assert_frame_equal(df, expected_frame(api.rows))
+
+def test_unchanged_sheet_reads_only_the_tail():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    first = sync.sync()
+    assert sync.sync() is first
+    assert sync.last_sync['mode'] == 'unchanged'
+
+def test_edit_in_tail_triggers_full_sync():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    sync.sync()
+    api.rows[-2] = order_row(28, quantity=99)
+
+    df = sync.sync()
+    assert sync.last_sync['mode'] == 'full'
+    assert df['QUANTITY'].iloc[-2] == 99
+
+def test_edit_above_tail_needs_a_forced_full_sync():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    sync.sync()
+    api.rows[3] = order_row(2, quantity=99)
+
+    # The tail is unchanged, so a background sync can't see the edit
+    sync.sync()
+    assert sync.last_sync['mode'] == 'unchanged'
+
+    df = sync.sync(force_full=True)
+    assert sync.last_sync['mode'] == 'full'
+    assert_frame_equal(df, expected_frame(api.rows))
+
+def test_edit_above_tail_is_picked_up_after_full_sync_interval():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api, full_sync_interval=60)
+    sync.sync()
+    api.rows[3] = order_row(2, quantity=99)
+    sync._full_synced_at -= 61
+
+    df = sync.sync()
+    assert sync.last_sync['mode'] == 'full'
+    assert df['QUANTITY'].iloc[2] == 99
+
+def test_shrinking_sheet_triggers_full_sync():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    sync.sync()
+    del api.rows[-3:]
+
+    df = sync.sync()
+    assert sync.last_sync['mode'] == 'full'
+    assert len(df) == 27
+    assert_frame_equal(df, expected_frame(api.rows))
+
+def test_header_change_triggers_full_sync():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    sync.sync()
+    api.rows[0] = HEADERS[:-1] + ['ACTUAL PRICE']
+
+    df = sync.sync()
+    assert sync.last_sync['mode'] == 'full'
+    assert 'ACTUAL PRICE' in df.columns and 'PRICE' not in df.columns
+
+@pytest.mark.parametrize('chunk_rows', [4, 7, 31, 1000])
+def test_chunked_full_sync_matches_single_read(chunk_rows):
+    sheet = make_sheet(61)
+    # A short blank gap keeps its place, as in a single read
+    sheet[10] = []
+    api = FakeValuesApi(sheet)
+    df = make_sync(api, chunk_rows=chunk_rows, parallel_reads=3).sync()
+    assert_frame_equal(df, expected_frame(sheet))
+
+def test_restored_snapshot_resumes_incrementally():
+    api = FakeValuesApi(make_sheet(30))
+    sync = make_sync(api)
+    df = sync.sync()
+
+    resumed = make_sync(api)
+    assert resumed.restore(df.copy(), sync.get_state())
+    api.rows.append(order_row(30))
+    resumed.sync()
+    assert resumed.last_sync['mode'] == 'incremental'
+    assert len(resumed.sync()) == 31
@@ -0,0 +1,150 @@
+import threading
+import pytest
+from utils import sheets_scheduler
+from utils.sheets_scheduler import SheetsRateLimitError, SheetsScheduler, TokenBucket
+from fakes import FakeRequest
+
+class FakeClock:
+    """Clock that only moves when something sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FakeResponse(dict):
+    """httplib2-style response: headers as dict items plus a status attribute"""
+
+    def __init__(self, status, headers):
+        super().__init__(headers)
+        self.status = status
+
+class FakeHttpError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.resp = FakeResponse(status, {'retry-after': str(retry_after)} if retry_after is not None else {})
+
+def failing_then(errors, result='ok'):
+    """respond() raising each error in turn, then returning result"""
+    errors = list(errors)
+    def respond():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return respond
+
+def make_scheduler(clock, **options):
+    options.setdefault('requests_per_minute', 600)
+    return SheetsScheduler(clock=clock, sleep=clock.sleep, **options)
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(6)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3:] == pytest.approx([0.5, 0.5, 0.5])
+
+def test_token_bucket_refills_while_idle():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire(), bucket.acquire()
+    clock.now += 10
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+
+def test_throttled_request_is_retried_with_jittered_backoff(monkeypatch):
+    clock = FakeClock()
+    bounds = []
+    monkeypatch.setattr(sheets_scheduler.random, 'uniform', lambda low, high: bounds.append(high) or high / 2)
+    scheduler = make_scheduler(clock, burst=10, base_delay=1.0, max_delay=3.0)
+    request = FakeRequest(failing_then([FakeHttpError(429)] * 3), method='POST')
+
+    assert scheduler.execute(request) == 'ok'
+    assert request.executions == 4
+    # Full jitter over an exponentially growing, capped window
+    assert bounds == [1.0, 2.0, 3.0]
+    assert clock.sleeps == [0.5, 1.0, 1.5]
+    stats = scheduler.stats()
+    assert stats['throttled'] == 3 and stats['retries'] == 3 and stats['sent'] == 4
+
+def test_retry_after_header_is_honoured():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, burst=10, base_delay=0.01)
+    request = FakeRequest(failing_then([FakeHttpError(429, retry_after=7)]))
+    assert scheduler.execute(request) == 'ok'
+    assert clock.sleeps == [7.0]
+
+def test_quota_errors_raise_after_max_retries():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, burst=10, max_retries=2)
+    request = FakeRequest(failing_then([FakeHttpError(429)] * 5), method='POST')
+    with pytest.raises(SheetsRateLimitError):
+        scheduler.execute(request)
+    assert request.executions == 3
+    assert scheduler.stats()['failures'] == 1
+
+def test_server_errors_are_retried_only_for_idempotent_requests():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, burst=10)
+
+    read = FakeRequest(failing_then([FakeHttpError(503)]), method='GET', uri='https://sheets/read')
+    assert scheduler.execute(read) == 'ok'
+    assert read.executions == 2
+
+    append = FakeRequest(failing_then([FakeHttpError(503)]), method='POST')
+    with pytest.raises(FakeHttpError):
+        scheduler.execute(append)
+    assert append.executions == 1
+
+    update = FakeRequest(failing_then([FakeHttpError(503)]), method='POST')
+    assert scheduler.execute(update, idempotent=True) == 'ok'
+
+def test_client_errors_are_not_retried():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, burst=10)
+    request = FakeRequest(failing_then([FakeHttpError(400)]), method='GET', uri='https://sheets/bad')
+    with pytest.raises(FakeHttpError):
+        scheduler.execute(request)
+    assert request.executions == 1
+
+def test_concurrent_identical_reads_are_coalesced():
+    scheduler = SheetsScheduler(requests_per_minute=6000, burst=100)
+    release = threading.Event()
+    sent = []
+
+    def respond():
+        sent.append(1)
+        release.wait(5)
+        return {'values': [['DATE']]}
+
+    results = []
+    def read():
+        results.append(scheduler.execute(FakeRequest(respond, method='GET', uri='https://sheets/values/A1')))
+
+    threads = [threading.Thread(target=read) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    # Wait until the followers are queued behind the leader's request
+    while scheduler.stats()['coalesced'] < 4:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(sent) == 1
+    assert results == [{'values': [['DATE']]}] * 5
+    assert scheduler.stats()['coalesced'] == 4
+
+def test_reads_are_not_coalesced_once_finished():
+    scheduler = SheetsScheduler(requests_per_minute=6000, burst=100)
+    first = FakeRequest(lambda: 1, method='GET', uri='https://sheets/values/A1')
+    second = FakeRequest(lambda: 2, method='GET', uri='https://sheets/values/A1')
+    assert scheduler.execute(first) == 1
+    assert scheduler.execute(second) == 2
@@ -0,0 +1,68 @@
+import threading
+from utils.sheets_transport import SheetsTransportPool
+from fakes import FakeRequest
+
+class RecordingRequest(FakeRequest):
+    """Request whose execute(http=...) records the transport it was sent on"""
+
+    def __init__(self, respond=lambda: 'ok'):
+        super().__init__(respond, method='GET', uri='https://sheets/values')
+        self.sent_on = []
+
+    def execute(self, http=None):
+        self.sent_on.append(http)
+        return super().execute()
+
+def test_sequential_requests_reuse_one_transport():
+    pool = SheetsTransportPool(object)
+    requests = [RecordingRequest() for _ in range(5)]
+    for request in requests:
+        assert pool.wrap(request).execute() == 'ok'
+    assert pool.created == 1
+    assert len({id(request.sent_on[0]) for request in requests}) == 1
+
+def test_transports_are_reused_across_threads():
+    pool = SheetsTransportPool(object)
+    # One request per short-lived thread, like Streamlit reruns and refresh threads
+    for _ in range(5):
+        thread = threading.Thread(target=lambda: pool.wrap(RecordingRequest()).execute())
+        thread.start()
+        thread.join()
+    assert pool.created == 1
+
+def test_concurrent_requests_never_share_a_transport():
+    pool = SheetsTransportPool(object)
+    barrier = threading.Barrier(3)
+
+    def respond():
+        barrier.wait(5)
+        return 'ok'
+
+    requests = [RecordingRequest(respond) for _ in range(3)]
+    threads = [threading.Thread(target=pool.wrap(request).execute) for request in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.created == 3
+    assert len({id(request.sent_on[0]) for request in requests}) == 3
+    # Afterwards they are all idle and reused
+    later = RecordingRequest()
+    pool.wrap(later).execute()
+    assert pool.created == 3
+
+def test_transport_is_returned_when_a_request_fails():
+    pool = SheetsTransportPool(object)
+    def fail():
+        raise RuntimeError("HTTP 500")
+    try:
+        pool.wrap(RecordingRequest(fail)).execute()
+    except RuntimeError:
+        pass
+    pool.wrap(RecordingRequest()).execute()
+    assert pool.created == 1
+
+def test_wrapped_request_keeps_method_and_uri():
+    wrapped = SheetsTransportPool(object).wrap(RecordingRequest())
+    assert (wrapped.method, wrapped.uri) == ('GET', 'https://sheets/values')
@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+from utils.sheets_writer import SheetsWriter, frame_to_values
+from fakes import FakeRequest
+
+class FakeSpreadsheet:
+    """In-memory spreadsheets() resource: sheets maps title -> rows; every request is logged"""
+
+    def __init__(self, sheets):
+        self.sheets = {title: {'sheet_id': i + 1, 'rows': rows} for i, (title, rows) in enumerate(sheets.items())}
+        self.requests = []
+        self.fail_next = None
+
+    def _request(self, name, respond):
+        self.requests.append(name)
+        def execute():
+            if self.fail_next:
+                error, self.fail_next = self.fail_next, None
+                raise error
+            return respond()
+        return FakeRequest(execute, method='GET' if name in ('get', 'values.get') else 'POST')
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    @staticmethod
+    def _title(a1_range):
+        return a1_range.split('!')[0].strip("'").replace("''", "'")
+
+    def get(self, spreadsheetId, fields=None, range=None):
+        if range is not None:
+            rows = self.sheets[self._title(range)]['rows']
+            return self._request('values.get', lambda: {'values': rows[:1]} if rows else {})
+        return self._request('get', lambda: {'sheets': [
+            {'properties': {'title': title, 'sheetId': sheet['sheet_id']}} for title, sheet in self.sheets.items()]})
+
+    def append(self, spreadsheetId, range, valueInputOption, insertDataOption, body):
+        def respond():
+            self.sheets[self._title(range)]['rows'].extend(body['values'])
+            return {'updates': {'updatedRows': len(body['values'])}}
+        return self._request('values.append', respond)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def respond():
+            add, cells = body['requests']
+            properties = add['addSheet']['properties']
+            rows = [[cell['userEnteredValue'].popitem()[1] for cell in row['values']] for row in cells['appendCells']['rows']]
+            self.sheets[properties['title']] = {'sheet_id': properties['sheetId'], 'rows': rows}
+            return {}
+        return self._request('batchUpdate', respond)
+
+def make_writer(service):
+    return SheetsWriter('spreadsheet', lambda: service, lambda request: request.execute())
+
+def bill_frame(n=3):
+    return pd.DataFrame({
+        'DATE': pd.to_datetime(['2024-05-01'] * n),
+        'VEGETABLE': [f'VEG{i}' for i in range(n)],
+        'QUANTITY': [1.5] * n,
+        'PRICE': [10.0] + [float('nan')] * (n - 1),
+    })
+
+def test_frame_to_values_formats_dates_and_blanks():
+    assert frame_to_values(bill_frame(2)) == [['01/05/2024', 'VEG0', 1.5, 10.0], ['01/05/2024', 'VEG1', 1.5, '']]
+
+def test_each_save_to_an_existing_sheet_is_one_append():
+    service = FakeSpreadsheet({'BILLS': [['DATE', 'VEGETABLE', 'QUANTITY', 'PRICE']]})
+    writer = make_writer(service)
+
+    writer.append_frame('BILLS', bill_frame())
+    # Sheet ids and the header state are looked up once
+    assert service.requests == ['get', 'values.get', 'values.append']
+
+    service.requests.clear()
+    for _ in range(3):
+        writer.append_frame('BILLS', bill_frame())
+    assert service.requests == ['values.append'] * 3
+    assert len(service.sheets['BILLS']['rows']) == 1 + 4 * 3
+
+def test_header_is_written_to_an_empty_sheet():
+    service = FakeSpreadsheet({'BILLS': []})
+    writer = make_writer(service)
+    writer.append_frame('BILLS', bill_frame(1))
+    writer.append_frame('BILLS', bill_frame(1))
+    assert service.sheets['BILLS']['rows'][0] == ['DATE', 'VEGETABLE', 'QUANTITY', 'PRICE']
+    assert len(service.sheets['BILLS']['rows']) == 3
+
+def test_new_sheet_is_added_with_its_rows_in_one_request():
+    service = FakeSpreadsheet({'BILLS': []})
+    writer = make_writer(service)
+    writer.append_frame('BILLS', bill_frame(1))
+    service.requests.clear()
+
+    writer.append_frame('2024-05-01 BILLS', bill_frame(2))
+    assert service.requests == ['batchUpdate']
+    assert service.sheets['2024-05-01 BILLS']['rows'] == [
+        ['DATE', 'VEGETABLE', 'QUANTITY', 'PRICE'],
+        ['01/05/2024', 'VEG0', 1.5, 10.0],
+        ['01/05/2024', 'VEG1', 1.5, ''],
+    ]
+
+    service.requests.clear()
+    writer.append_frame('2024-05-01 BILLS', bill_frame(1))
+    assert service.requests == ['values.append']
+
+def test_failed_save_drops_the_sheet_cache():
+    service = FakeSpreadsheet({'BILLS': [['DATE', 'VEGETABLE', 'QUANTITY', 'PRICE']]})
+    writer = make_writer(service)
+    writer.append_frame('BILLS', bill_frame(1))
+
+    service.fail_next = RuntimeError('sheet was deleted')
+    with pytest.raises(RuntimeError):
+        writer.append_frame('BILLS', bill_frame(1))
+
+    service.requests.clear()
+    writer.append_frame('BILLS', bill_frame(1))
+    assert service.requests == ['get', 'values.get', 'values.append']